@@ -4,9 +4,20 @@ from __future__ import annotations
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_API_KEY, CONF_HOST, Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN, CONF_WATCHED_ALBUMS, FAVORITES_SOURCE,
+    STORAGE_VERSION, STORAGE_KEY, SLIDESHOW_STORAGE_KEY,
+    CONF_RENDER_POOL, DEFAULT_RENDER_POOL,
+    CONF_MAX_CONCURRENT_RENDERS, DEFAULT_MAX_CONCURRENT_RENDERS,
+    CONF_REALTIME_EVENTS, DEFAULT_REALTIME_EVENTS
+)
+from .asset_coordinator import ImmichAssetCoordinator
+from .events import ImmichEventListener
 from .hub import ImmichHub, InvalidAuth
+from .models import ImmichData
+from .renderer import ImageRenderer
 
 PLATFORMS: list[Platform] = [Platform.IMAGE]
 
@@ -18,10 +29,32 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     hub = ImmichHub(host=entry.data[CONF_HOST], hass=hass, config_entry=entry, api_key=entry.data[CONF_API_KEY])
 
-    if not await hub.authenticate():
-        raise InvalidAuth
+    try:
+        if not await hub.authenticate():
+            raise InvalidAuth
+    except Exception:
+        await hub.async_close()
+        raise
 
-    hass.data[DOMAIN][entry.entry_id] = hub
+    renderer = ImageRenderer(
+        pool_type=entry.options.get(CONF_RENDER_POOL, DEFAULT_RENDER_POOL),
+        max_workers=entry.options.get(CONF_MAX_CONCURRENT_RENDERS, DEFAULT_MAX_CONCURRENT_RENDERS),
+    )
+
+    coordinator = ImmichAssetCoordinator(hass, hub)
+    # Start from the asset lists of the last run, they are synced in the background
+    await coordinator.async_restore([FAVORITES_SOURCE, *entry.options.get(CONF_WATCHED_ALBUMS, [])])
+
+    events = None
+    if entry.options.get(CONF_REALTIME_EVENTS, DEFAULT_REALTIME_EVENTS):
+        events = ImmichEventListener(hass, hub, coordinator)
+        events.async_start()
+
+    hass.data[DOMAIN][entry.entry_id] = ImmichData(
+        hub=hub, renderer=renderer, coordinator=coordinator, events=events
+    )
+
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
@@ -31,6 +64,24 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        data: ImmichData = hass.data[DOMAIN].pop(entry.entry_id)
+        if data.events is not None:
+            await data.events.async_stop()
+        data.coordinator.async_cancel_cache_warming()
+        data.coordinator.async_flush_events()
+        await data.coordinator.async_save()
+        data.renderer.shutdown()
+        await data.hub.async_close()
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the stored state of a removed config entry."""
+    await Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry.entry_id)).async_remove()
+    await Store(hass, STORAGE_VERSION, SLIDESHOW_STORAGE_KEY.format(entry_id=entry.entry_id)).async_remove()
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
@@ -0,0 +1,551 @@
+"""Asset list coordinator for the Immich integration."""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass
+import logging
+from typing import Any
+import uuid
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import (
+    DOMAIN, FAVORITES_SOURCE, ASSET_LIST_REFRESH_INTERVAL, EVENTS_REFRESH_INTERVAL, EVENTS_BATCH_DELAY,
+    CONF_INCREMENTAL_SYNC, DEFAULT_INCREMENTAL_SYNC,
+    STORAGE_VERSION, STORAGE_KEY, STORAGE_SAVE_DELAY, SLIDESHOW_STORAGE_KEY, SLIDESHOW_SAVE_DELAY
+)
+from .asset_index import AssetIndex, AssetIndexBuilder
+from .hub import ApiError, ImmichHub
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class SourceSyncState:
+    """What the last sync of a source saw, to tell whether it changed since."""
+
+    # Newest updatedAt among the synced assets
+    watermark: str | None = None
+    # Album updatedAt and assetCount, unused for favorites
+    updated_at: str | None = None
+    asset_count: int | None = None
+    # Album assets that aren't images, so they aren't in the list of IDs
+    other_count: int = 0
+
+
+def _newest_update(assets: list[dict], watermark: str | None = None) -> str | None:
+    """Return the newest updatedAt of the assets and the watermark."""
+    timestamps = [asset["updatedAt"] for asset in assets if asset.get("updatedAt")]
+    if watermark:
+        timestamps.append(watermark)
+    return max(timestamps, default=None)
+
+
+def _event_asset_id(asset_id: Any) -> str:
+    """Return an asset ID received in an event, raising ValueError if it isn't one."""
+    if not isinstance(asset_id, str):
+        raise ValueError(f"Not an asset ID: {asset_id!r}")
+    uuid.UUID(asset_id)
+    return asset_id
+
+
+class ImmichAssetCoordinator(DataUpdateCoordinator[dict[str, AssetIndex]]):
+    """Keep one snapshot of the asset index of every source watched by a config entry.
+
+    A source is either FAVORITES_SOURCE or an album ID. Asset indexes, their sync state
+    and the slideshow state of the entity showing each source are stored across restarts.
+    """
+
+    def __init__(self, hass: HomeAssistant, hub: ImmichHub) -> None:
+        """Initialize."""
+        super().__init__(
+            hass, _LOGGER, name=DOMAIN, update_interval=ASSET_LIST_REFRESH_INTERVAL
+        )
+        self.hub = hub
+        self.data = {}
+        self.cache_warm_progress: dict[str, int] = {}
+        # Source -> bytes per second downloaded by the current or last cache warming run
+        self.cache_warm_throughput: dict[str, int] = {}
+        self._source_refs: Counter[str] = Counter()
+        self._inflight: dict[str, asyncio.Task[AssetIndex]] = {}
+        self._sync_state: dict[str, SourceSyncState] = {}
+        # Set once a source has at least a partial list of asset IDs
+        self._source_ready: dict[str, asyncio.Event] = {}
+        self._cache_warm_tasks: dict[str, asyncio.Task] = {}
+        self._events_connected = False
+        # Event changes waiting to be applied in one pass
+        self._pending_removals: set[str] = set()
+        self._pending_updates: dict[str, dict] = {}
+        self._unsub_flush_events: CALLBACK_TYPE | None = None
+        entry_id = hub.config_entry.entry_id
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry_id))
+        self._slideshow_store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, SLIDESHOW_STORAGE_KEY.format(entry_id=entry_id)
+        )
+        # Source -> stored data, for sources restored or no longer tracked
+        self._stored: dict[str, dict[str, Any]] = {}
+        # Source -> the asset index last stored, whose serialized form is reused while it is current
+        self._stored_indexes: dict[str, AssetIndex] = {}
+        # Source -> slideshow state stored, and callable returning that of the entity showing it
+        self._stored_slideshows: dict[str, dict[str, Any]] = {}
+        self._slideshow_states: dict[str, Callable[[], dict[str, Any] | None]] = {}
+        # Set while a delayed save is pending, as scheduling another would push it back
+        self._save_pending = False
+        self._slideshow_save_pending = False
+        # Restored sources to sync in the background once tracked
+        self._revalidate: set[str] = set()
+
+    async def async_restore(self, sources: Iterable[str]) -> None:
+        """Load the stored asset indexes of the given sources, forgetting any others."""
+        stored: dict[str, Any] = await self._store.async_load() or {}
+        stored_sources: dict[str, dict[str, Any]] = stored.get("sources", {})
+        stored_slideshows: dict[str, Any] = (await self._slideshow_store.async_load() or {}).get("sources", {})
+
+        for source in sources:
+            if (source_data := stored_sources.get(source)) is None:
+                continue
+            try:
+                asset_index = await self.hass.async_add_executor_job(
+                    AssetIndex.from_dict, source_data["asset_index"]
+                )
+                sync_state = (
+                    SourceSyncState(**source_data["sync_state"]) if source_data.get("sync_state") else None
+                )
+            except (KeyError, TypeError, ValueError) as exception:
+                _LOGGER.debug("Ignoring stored assets of %s: %s", source, exception)
+                continue
+
+            self._stored[source] = source_data
+            self._stored_indexes[source] = asset_index
+            if isinstance(slideshow := stored_slideshows.get(source), dict):
+                self._stored_slideshows[source] = slideshow
+            # Not published, which would store it again right away
+            self.data[source] = asset_index
+            self._get_source_ready(source).set()
+            if sync_state is not None:
+                self._sync_state[source] = sync_state
+            self._revalidate.add(source)
+
+    def stored_slideshow_state(self, source: str) -> dict[str, Any] | None:
+        """Return the slideshow state stored for a source."""
+        return self._stored_slideshows.get(source)
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Store the asset indexes within STORAGE_SAVE_DELAY, coalescing the changes made until then."""
+        if not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+
+    @callback
+    def async_schedule_slideshow_save(self) -> None:
+        """Store the slideshow states within SLIDESHOW_SAVE_DELAY, coalescing the changes made until then."""
+        if not self._slideshow_save_pending:
+            self._slideshow_save_pending = True
+            self._slideshow_store.async_delay_save(self._slideshow_data_to_store, SLIDESHOW_SAVE_DELAY)
+
+    async def async_save(self) -> None:
+        """Store the current state now."""
+        await self._store.async_save(self._data_to_store())
+        await self._slideshow_store.async_save(self._slideshow_data_to_store())
+
+    @callback
+    def _data_to_store(self) -> dict[str, Any]:
+        """Return the stored asset indexes, refreshed for every tracked source."""
+        self._save_pending = False
+        for source in self._source_refs:
+            self._store_source(source)
+        return {"sources": self._stored}
+
+    @callback
+    def _slideshow_data_to_store(self) -> dict[str, Any]:
+        """Return the stored slideshow states, refreshed for every tracked source."""
+        self._slideshow_save_pending = False
+        for source in self._source_refs:
+            self._store_slideshow(source)
+        return {"sources": self._stored_slideshows}
+
+    @callback
+    def _store_source(self, source: str) -> None:
+        """Refresh the stored asset index of a source, serializing it again only if it changed."""
+        if (asset_index := self.data.get(source)) is None:
+            return
+
+        sync_state = self._sync_state.get(source)
+        if self._stored_indexes.get(source) is asset_index and source in self._stored:
+            stored_index = self._stored[source]["asset_index"]
+        else:
+            stored_index = asset_index.as_dict()
+            self._stored_indexes[source] = asset_index
+        self._stored[source] = {
+            "asset_index": stored_index,
+            "sync_state": asdict(sync_state) if sync_state is not None else None,
+        }
+
+    @callback
+    def _store_slideshow(self, source: str) -> None:
+        """Refresh the stored slideshow state of a source from the entity showing it."""
+        if (get_slideshow_state := self._slideshow_states.get(source)) is None:
+            return
+        if (slideshow_state := get_slideshow_state()) is not None:
+            self._stored_slideshows[source] = slideshow_state
+
+    @callback
+    def async_track_source(
+        self,
+        source: str,
+        update_callback: CALLBACK_TYPE,
+        slideshow_state: Callable[[], dict[str, Any] | None] | None = None,
+    ) -> CALLBACK_TYPE:
+        """Refresh a source on every scheduled pass until the returned callable is called.
+
+        slideshow_state returns what to store to resume the slideshow of the source.
+        """
+        self._source_refs[source] += 1
+        remove_listener = self.async_add_listener(update_callback)
+        if slideshow_state is not None:
+            self._slideshow_states[source] = slideshow_state
+
+        if source in self._revalidate:
+            self._revalidate.discard(source)
+            self.hass.async_create_background_task(
+                self._async_revalidate_source(source), f"immich revalidate {source}"
+            )
+
+        @callback
+        def remove_source() -> None:
+            remove_listener()
+            self._source_refs[source] -= 1
+            if self._source_refs[source] <= 0:
+                # Keep what is stored for the source, the entity may come back after a reload
+                self._store_source(source)
+                self._store_slideshow(source)
+                self._slideshow_states.pop(source, None)
+                del self._source_refs[source]
+                self.data.pop(source, None)
+                self._sync_state.pop(source, None)
+                self._source_ready.pop(source, None)
+                self.cache_warm_progress.pop(source, None)
+                self.cache_warm_throughput.pop(source, None)
+                if task := self._cache_warm_tasks.pop(source, None):
+                    task.cancel()
+
+        return remove_source
+
+    @callback
+    def async_set_events_connected(self, connected: bool) -> None:
+        """Poll rarely while real-time events keep the asset lists current."""
+        if connected == self._events_connected:
+            return
+
+        self._events_connected = connected
+        self.update_interval = EVENTS_REFRESH_INTERVAL if connected else ASSET_LIST_REFRESH_INTERVAL
+        if connected and self.data:
+            # Catch up with changes made while disconnected
+            self.async_request_sync()
+
+    @callback
+    def async_request_sync(self) -> None:
+        """Sync every tracked source soon, coalescing bursts of requests."""
+        self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def async_remove_assets(self, asset_ids: list[str]) -> None:
+        """Drop deleted or trashed assets from every source, soon."""
+        asset_ids = [_event_asset_id(asset_id) for asset_id in asset_ids]
+        for asset_id in asset_ids:
+            self._pending_updates.pop(asset_id, None)
+            self._pending_removals.add(asset_id)
+        self._schedule_flush_events()
+
+    @callback
+    def async_update_asset(self, asset: dict) -> None:
+        """Apply the metadata of an updated asset, adding it to or removing it from favorites, soon."""
+        asset_id = _event_asset_id(asset["id"])
+        self._pending_removals.discard(asset_id)
+        self._pending_updates[asset_id] = asset
+        self._schedule_flush_events()
+
+    @callback
+    def _schedule_flush_events(self) -> None:
+        """Apply pending event changes once a burst of events is over."""
+        if self._unsub_flush_events is None:
+            self._unsub_flush_events = async_call_later(
+                self.hass, EVENTS_BATCH_DELAY, self.async_flush_events
+            )
+
+    @callback
+    def async_flush_events(self, _now: Any = None) -> None:
+        """Apply pending event changes, with one merge per source."""
+        if self._unsub_flush_events is not None:
+            self._unsub_flush_events()
+            self._unsub_flush_events = None
+        removed_ids, self._pending_removals = self._pending_removals, set()
+        updated_assets, self._pending_updates = self._pending_updates, {}
+
+        changed = False
+        for source, asset_index in list(self.data.items()):
+            removed = [asset_id for asset_id in removed_ids if asset_id in asset_index]
+            added = []
+            for asset_id, asset in updated_assets.items():
+                if source == FAVORITES_SOURCE:
+                    is_favorite = asset.get("isFavorite") and not asset.get("isTrashed")
+                    if not is_favorite or asset.get("type") != "IMAGE":
+                        if asset_id in asset_index:
+                            removed.append(asset_id)
+                        continue
+                    added.append(asset)
+                elif asset_id in asset_index:
+                    added.append(asset)
+
+            if not added and not removed:
+                continue
+            try:
+                merged = asset_index.merge(added, removed)
+            except (KeyError, TypeError, ValueError) as exception:
+                _LOGGER.warning("Unable to apply events to %s, resyncing: %s", source, exception)
+                self.async_request_sync()
+                continue
+            self._publish_asset_ids(source, merged)
+            changed = True
+
+        if changed:
+            self.async_update_listeners()
+
+    async def async_get_asset_ids(self, source: str) -> AssetIndex:
+        """Return the asset index of a source, listing it first if it isn't known yet.
+
+        Returns as soon as the first page of a paginated listing is in.
+        """
+        if source in self.data:
+            return self.data[source]
+
+        task = self._async_start_refresh(source)
+        ready_waiter = asyncio.ensure_future(self._get_source_ready(source).wait())
+        try:
+            await asyncio.wait((task, ready_waiter), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            ready_waiter.cancel()
+
+        if source in self.data:
+            return self.data[source]
+        return await asyncio.shield(task)
+
+    async def _async_update_data(self) -> dict[str, AssetIndex]:
+        """Refresh every tracked source in one pass."""
+        sources = list(self._source_refs)
+        results = await asyncio.gather(
+            *(self._async_refresh_source(source) for source in sources),
+            return_exceptions=True,
+        )
+
+        for source, result in zip(sources, results):
+            if isinstance(result, HomeAssistantError):
+                _LOGGER.warning("Unable to refresh assets of %s: %s", source, result)
+            elif isinstance(result, BaseException):
+                raise result
+        return dict(self.data)
+
+    async def _async_refresh_source(self, source: str) -> AssetIndex:
+        """List a source, sharing the request with concurrent callers."""
+        return await asyncio.shield(self._async_start_refresh(source))
+
+    async def _async_revalidate_source(self, source: str) -> None:
+        """Sync a source restored from storage with the server."""
+        try:
+            await self._async_refresh_source(source)
+        except HomeAssistantError as exception:
+            _LOGGER.warning("Unable to refresh assets of %s: %s", source, exception)
+
+    @callback
+    def _async_start_refresh(self, source: str) -> asyncio.Task[AssetIndex]:
+        """Return the running listing task of a source, starting one if needed."""
+        if (task := self._inflight.get(source)) is None:
+            task = self._inflight[source] = self.hass.async_create_task(
+                self._async_list_source(source)
+            )
+        return task
+
+    def _get_source_ready(self, source: str) -> asyncio.Event:
+        """Return the event set once a source has asset IDs."""
+        return self._source_ready.setdefault(source, asyncio.Event())
+
+    @callback
+    def _publish_asset_ids(self, source: str, asset_index: AssetIndex) -> None:
+        """Make a (possibly partial) asset index available to entities."""
+        if self.data.get(source) is not asset_index:
+            self.data[source] = asset_index
+            self.async_schedule_save()
+        self._get_source_ready(source).set()
+
+    async def _async_list_source(self, source: str) -> AssetIndex:
+        """Sync the asset IDs of a source and store them in the snapshot."""
+        previous_asset_ids = self.data.get(source)
+        try:
+            asset_ids = await self._async_sync_source(source)
+        finally:
+            self._inflight.pop(source, None)
+
+        if source != FAVORITES_SOURCE and (
+            asset_ids != previous_asset_ids or self.cache_warm_progress.get(source) != 100
+        ):
+            self._start_cache_warming(source, asset_ids)
+
+        self._publish_asset_ids(source, asset_ids)
+        return asset_ids
+
+    async def _async_sync_source(self, source: str) -> AssetIndex:
+        """Apply the changes since the last sync, or list the whole source."""
+        state = self._sync_state.get(source)
+        asset_ids = self.data.get(source)
+
+        if (
+            state is not None
+            and asset_ids is not None
+            and self.hub.options.get(CONF_INCREMENTAL_SYNC, DEFAULT_INCREMENTAL_SYNC)
+        ):
+            try:
+                if source == FAVORITES_SOURCE:
+                    synced_asset_ids = await self._async_incremental_sync_favorites(state, asset_ids)
+                else:
+                    synced_asset_ids = await self._async_incremental_sync_album(source, state, asset_ids)
+            except ApiError:
+                _LOGGER.debug("Incremental sync of %s is not supported, doing a full sync", source)
+                synced_asset_ids = None
+
+            if synced_asset_ids is not None:
+                return synced_asset_ids
+
+        _LOGGER.debug("Full sync of %s", source)
+        if source == FAVORITES_SOURCE:
+            return await self._async_full_sync_favorites()
+        return await self._async_full_sync_album(source)
+
+    async def _async_full_sync_favorites(self) -> AssetIndex:
+        """List all favorite images page by page."""
+        # Only a first listing is published early, a resync keeps serving the old index until done
+        publish_first_page = FAVORITES_SOURCE not in self.data
+        builder = AssetIndexBuilder()
+        watermark: str | None = None
+
+        async for page in self.hub.iter_favorite_image_pages():
+            builder.add_assets(page)
+            watermark = _newest_update(page, watermark)
+            if publish_first_page and len(builder):
+                self._publish_asset_ids(FAVORITES_SOURCE, builder.build())
+                publish_first_page = False
+
+        self._sync_state[FAVORITES_SOURCE] = SourceSyncState(watermark=watermark)
+        # Sorting a large index by ID takes a while
+        return await self.hass.async_add_executor_job(builder.build)
+
+    async def _async_full_sync_album(self, album_id: str) -> AssetIndex:
+        """List all images of an album."""
+        album_info = await self.hub.get_album_info(album_id)
+        assets: list[dict] = album_info["assets"]
+        images = [asset for asset in assets if asset["type"] == "IMAGE"]
+        self._sync_state[album_id] = SourceSyncState(
+            watermark=_newest_update(assets),
+            updated_at=album_info.get("updatedAt"),
+            asset_count=album_info.get("assetCount", len(assets)),
+            other_count=len(assets) - len(images),
+        )
+        return await self.hass.async_add_executor_job(AssetIndex.from_assets, images)
+
+    async def _async_incremental_sync_favorites(
+        self, state: SourceSyncState, asset_ids: AssetIndex
+    ) -> AssetIndex | None:
+        """Apply favorites changes since the last sync, None if a full sync is needed."""
+        changed_assets = await self.hub.search_assets(
+            {"updatedAfter": state.watermark, "withDeleted": True, "type": "IMAGE", "withExif": True}
+        ) if state.watermark else []
+
+        added = [
+            asset for asset in changed_assets
+            if asset.get("isFavorite") and not asset.get("isTrashed")
+        ]
+        removed = {
+            asset["id"] for asset in changed_assets
+            if not asset.get("isFavorite") or asset.get("isTrashed")
+        }
+        synced_asset_ids = asset_ids.merge(added, removed)
+
+        statistics = await self.hub.get_asset_statistics(is_favorite=True)
+        if statistics.get("images") != len(synced_asset_ids):
+            _LOGGER.debug("Favorites count changed unexpectedly, resyncing")
+            return None
+
+        state.watermark = _newest_update(changed_assets, state.watermark)
+        return synced_asset_ids
+
+    async def _async_incremental_sync_album(
+        self, album_id: str, state: SourceSyncState, asset_ids: AssetIndex
+    ) -> AssetIndex | None:
+        """Apply album changes since the last sync, None if a full sync is needed."""
+        album_info = await self.hub.get_album_info(album_id, with_assets=False)
+        if (
+            album_info.get("updatedAt") == state.updated_at
+            and album_info.get("assetCount") == state.asset_count
+        ):
+            return asset_ids
+
+        if not state.watermark:
+            return None
+
+        changed_assets = await self.hub.search_assets(
+            {
+                "albumIds": [album_id],
+                "updatedAfter": state.watermark,
+                "withDeleted": True,
+                "type": "IMAGE",
+                "withExif": True,
+            }
+        )
+        added = [asset for asset in changed_assets if not asset.get("isTrashed")]
+        removed = {asset["id"] for asset in changed_assets if asset.get("isTrashed")}
+        synced_asset_ids = asset_ids.merge(added, removed)
+
+        # Assets removed from the album aren't reported by the search, only the count tells
+        if len(synced_asset_ids) + state.other_count != album_info.get("assetCount"):
+            _LOGGER.debug("Album %s count changed unexpectedly, resyncing", album_id)
+            return None
+
+        state.watermark = _newest_update(changed_assets, state.watermark)
+        state.updated_at = album_info.get("updatedAt")
+        state.asset_count = album_info.get("assetCount")
+        return synced_asset_ids
+
+    def _start_cache_warming(self, source: str, asset_ids: AssetIndex) -> None:
+        """Warm the asset cache for a source in the background, restarting any previous run."""
+        if self.hub.asset_cache is None:
+            return
+
+        if task := self._cache_warm_tasks.get(source):
+            task.cancel()
+
+        @callback
+        def progress_callback(cached: int, total: int, throughput: float) -> None:
+            self.cache_warm_throughput[source] = round(throughput)
+            progress = round(100 * cached / total)
+            if progress != self.cache_warm_progress.get(source):
+                self.cache_warm_progress[source] = progress
+                self.async_update_listeners()
+
+        self._cache_warm_tasks[source] = self.hass.async_create_background_task(
+            self.hub.cache_album_assets(asset_ids, progress_callback),
+            f"immich cache warming {source}",
+        )
+
+    @callback
+    def async_cancel_cache_warming(self) -> None:
+        """Stop all background cache warming."""
+        for task in self._cache_warm_tasks.values():
+            task.cancel()
+        self._cache_warm_tasks.clear()
+
@@ -0,0 +1,441 @@
+"""Compact index of the assets of a source."""
+from __future__ import annotations
+
+from array import array
+import base64
+import binascii
+from bisect import bisect_left, insort
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from functools import cached_property
+import hashlib
+from itertools import accumulate
+import sys
+from typing import Any, NamedTuple
+import uuid
+
+_ID_SIZE = 16
+# Immich checksums are base64 encoded SHA-1 digests
+_VERSION_SIZE = 20
+_MAX_NAME_SIZE = 0xFFFF
+# Beyond this many appended assets, sorting again beats inserting them one by one
+_MAX_SORTED_INSERTS = 1024
+
+# EXIF orientations that rotate the image by 90 degrees, as numbers or as exiftool descriptions
+_ROTATED_ORIENTATIONS = {"5", "6", "7", "8", "Rotate 90 CW", "Rotate 270 CW"}
+
+# Orientation flags
+ORIENTATION_UNKNOWN = -1
+ORIENTATION_LANDSCAPE = 0
+ORIENTATION_PORTRAIT = 1
+
+
+def pack_array(values: array) -> str:
+    """Encode a typed array for storage, little-endian whatever the platform."""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode()
+
+
+def unpack_array(typecode: str, packed: str) -> array:
+    """Decode a typed array encoded by pack_array."""
+    values = array(typecode)
+    values.frombytes(base64.b64decode(packed))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def asset_dimensions(asset: dict) -> tuple[int, int] | None:
+    """Return the (width, height) an asset displays at from its Immich metadata, None if unknown."""
+    exif_info = asset.get("exifInfo") or {}
+    width = exif_info.get("exifImageWidth")
+    height = exif_info.get("exifImageHeight")
+
+    if width and height:
+        if str(exif_info.get("orientation")) in _ROTATED_ORIENTATIONS:
+            width, height = height, width
+    else:
+        width = asset.get("width")
+        height = asset.get("height")
+        if not width or not height:
+            return None
+
+    return int(width), int(height)
+
+
+def _packed_version(asset: dict) -> bytes:
+    """Return the checksum of an asset as raw bytes, or a digest of what identifies its version."""
+    if checksum := asset.get("checksum"):
+        try:
+            digest = base64.b64decode(checksum, validate=True)
+        except (binascii.Error, ValueError):
+            digest = b""
+        if len(digest) == _VERSION_SIZE and base64.b64encode(digest).decode() == checksum:
+            return digest
+        return hashlib.sha1(checksum.encode()).digest()
+    if updated_at := asset.get("updatedAt"):
+        return hashlib.sha1(updated_at.encode()).digest()
+    return bytes(_VERSION_SIZE)
+
+
+class AssetInfo(NamedTuple):
+    """What the integration knows about one asset of an index."""
+
+    asset_id: str
+    # Checksum, so a changed asset gets a new cache key, empty if unknown
+    version: str
+    # Displayed size, None if unknown
+    dimensions: tuple[int, int] | None
+    # Size of the original file, 0 if unknown
+    file_size: int
+    # Original file name and MIME type, empty if unknown
+    original_file_name: str
+    original_mime_type: str
+
+
+@dataclass
+class _Columns:
+    """Per-asset metadata in parallel typed arrays, one entry per position."""
+
+    ids: bytes | bytearray = b""
+    orientations: array = field(default_factory=lambda: array("b"))
+    widths: array = field(default_factory=lambda: array("I"))
+    heights: array = field(default_factory=lambda: array("I"))
+    versions: bytes | bytearray = b""
+    file_sizes: array = field(default_factory=lambda: array("Q"))
+    # Original file names, UTF-8 encoded back to back
+    name_sizes: array = field(default_factory=lambda: array("H"))
+    names: bytes | bytearray = b""
+    # Codes into mime_types, whose first entry stands for unknown
+    mime_codes: array = field(default_factory=lambda: array("B"))
+    mime_types: list[str] = field(default_factory=lambda: [""])
+
+
+class AssetIndex:
+    """Immutable list of asset IDs with the metadata the integration uses, in source order.
+
+    IDs are packed 16-byte UUIDs in one buffer, with orientation, dimensions, checksums,
+    file sizes and original names in parallel typed arrays, so large sources cost a few
+    dozen bytes per asset and one index is shared read-only by every entity and the hub.
+    """
+
+    def __init__(self, columns: _Columns, sorted_positions: array | None = None) -> None:
+        """Initialize from columns built by AssetIndexBuilder.
+
+        sorted_positions may order a prefix of the positions by ID, the rest are sorted in.
+        """
+        self._columns = columns
+        self._ids = columns.ids
+        self._orientations = columns.orientations
+        self._widths = columns.widths
+        self._heights = columns.heights
+        # Positions ordered by packed ID, for lookups by binary search
+        if sorted_positions is None or len(self) - len(sorted_positions) > _MAX_SORTED_INSERTS:
+            self._sorted = array("I", sorted(range(len(self)), key=self._packed_id))
+        else:
+            self._sorted = sorted_positions
+            for position in range(len(sorted_positions), len(self)):
+                insort(self._sorted, position, key=self._packed_id)
+        # Positions of portraits and landscapes, in source order
+        self.portraits = array(
+            "I", (position for position, flag in enumerate(self._orientations) if flag == ORIENTATION_PORTRAIT)
+        )
+        self.landscapes = array(
+            "I", (position for position, flag in enumerate(self._orientations) if flag == ORIENTATION_LANDSCAPE)
+        )
+
+    @classmethod
+    def from_assets(cls, assets: Iterable[dict]) -> AssetIndex:
+        """Build an index from asset metadata."""
+        builder = AssetIndexBuilder()
+        builder.add_assets(assets)
+        return builder.build()
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> AssetIndex:
+        """Restore an index stored with as_dict, raising ValueError if it is inconsistent."""
+        columns = _Columns(
+            ids=base64.b64decode(data["ids"]),
+            orientations=unpack_array("b", data["orientations"]),
+            widths=unpack_array("I", data["widths"]),
+            heights=unpack_array("I", data["heights"]),
+            versions=base64.b64decode(data["versions"]),
+            file_sizes=unpack_array("Q", data["file_sizes"]),
+            name_sizes=unpack_array("H", data["name_sizes"]),
+            names=base64.b64decode(data["names"]),
+            mime_codes=unpack_array("B", data["mime_codes"]),
+            mime_types=[str(mime_type) for mime_type in data["mime_types"]],
+        )
+        size = len(columns.orientations)
+        if (
+            len(columns.ids) != _ID_SIZE * size
+            or len(columns.versions) != _VERSION_SIZE * size
+            or not size == len(columns.widths) == len(columns.heights) == len(columns.file_sizes)
+            or not size == len(columns.name_sizes) == len(columns.mime_codes)
+            or sum(columns.name_sizes) != len(columns.names)
+            or not columns.mime_types
+            or any(code >= len(columns.mime_types) for code in columns.mime_codes)
+        ):
+            raise ValueError("Stored asset index is inconsistent")
+        return cls(columns)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the index in a form that can be stored as JSON."""
+        columns = self._columns
+        return {
+            "ids": base64.b64encode(columns.ids).decode(),
+            "orientations": pack_array(columns.orientations),
+            "widths": pack_array(columns.widths),
+            "heights": pack_array(columns.heights),
+            "versions": base64.b64encode(columns.versions).decode(),
+            "file_sizes": pack_array(columns.file_sizes),
+            "name_sizes": pack_array(columns.name_sizes),
+            "names": base64.b64encode(columns.names).decode(),
+            "mime_codes": pack_array(columns.mime_codes),
+            "mime_types": list(columns.mime_types),
+        }
+
+    @cached_property
+    def digest(self) -> str:
+        """Return a fingerprint of the IDs and their order, to tell whether positions still apply."""
+        return hashlib.blake2b(self._ids, digest_size=16).hexdigest()
+
+    @cached_property
+    def _name_offsets(self) -> array:
+        """Return where the name of every position starts, and where the last one ends."""
+        return array("I", accumulate(self._columns.name_sizes, initial=0))
+
+    def __len__(self) -> int:
+        """Return the number of assets."""
+        return len(self._orientations)
+
+    def __getitem__(self, position: int) -> str:
+        """Return the asset ID at a position."""
+        if not 0 <= position < len(self):
+            raise IndexError("asset index out of range")
+        return str(uuid.UUID(bytes=self._packed_id(position)))
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the asset IDs in source order."""
+        for position in range(len(self)):
+            yield self[position]
+
+    def __contains__(self, asset_id: object) -> bool:
+        """Return whether the index holds the asset."""
+        return isinstance(asset_id, str) and self.position(asset_id) is not None
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether both indexes hold the same assets in the same order."""
+        if not isinstance(other, AssetIndex):
+            return NotImplemented
+        return self._ids == other._ids
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def position(self, asset_id: str) -> int | None:
+        """Return the position of an asset, None if it isn't in the index."""
+        try:
+            packed_id = uuid.UUID(asset_id).bytes
+        except ValueError:
+            return None
+        position = self._find(packed_id)
+        return position if position >= 0 else None
+
+    def is_portrait(self, position: int) -> bool | None:
+        """Return whether the asset at a position displays as a portrait, None if unknown."""
+        flag = self._orientations[position]
+        return None if flag == ORIENTATION_UNKNOWN else flag == ORIENTATION_PORTRAIT
+
+    def dimensions(self, position: int) -> tuple[int, int] | None:
+        """Return the displayed size of the asset at a position, None if unknown."""
+        if not self._widths[position]:
+            return None
+        return self._widths[position], self._heights[position]
+
+    def info(self, position: int) -> AssetInfo:
+        """Return the metadata of the asset at a position."""
+        columns = self._columns
+        version = columns.versions[position * _VERSION_SIZE:(position + 1) * _VERSION_SIZE]
+        name_offsets = self._name_offsets
+        return AssetInfo(
+            asset_id=self[position],
+            version=base64.b64encode(version).decode() if any(version) else "",
+            dimensions=self.dimensions(position),
+            file_size=columns.file_sizes[position],
+            original_file_name=columns.names[name_offsets[position]:name_offsets[position + 1]].decode(
+                errors="replace"
+            ),
+            original_mime_type=columns.mime_types[columns.mime_codes[position]],
+        )
+
+    def merge(self, added_assets: Iterable[dict], removed_ids: Iterable[str]) -> AssetIndex:
+        """Return a new index without the removed assets, and with added ones appended.
+
+        Added assets already in the index keep their place and get the new metadata.
+        Unchanged runs of assets are copied as slices, and the ID order is carried over.
+        """
+        removed_positions = {
+            position
+            for position in (self._find(uuid.UUID(asset_id).bytes) for asset_id in removed_ids)
+            if position >= 0
+        }
+        updated: dict[int, dict] = {}
+        appended: dict[bytes, dict] = {}
+        for asset in added_assets:
+            packed_id = uuid.UUID(asset["id"]).bytes
+            position = self._find(packed_id)
+            if position >= 0 and position not in removed_positions:
+                updated.setdefault(position, asset)
+            else:
+                appended.setdefault(packed_id, asset)
+
+        if not removed_positions and not updated and not appended:
+            return self
+
+        builder = AssetIndexBuilder(self._columns.mime_types)
+        # Old position -> new position, -1 if removed
+        new_positions = array("i")
+        start = 0
+        for position in sorted(removed_positions | updated.keys()):
+            offset = len(builder)
+            builder.add_range(self, start, position)
+            new_positions.extend(range(offset, offset + position - start))
+            if (asset := updated.get(position)) is not None:
+                new_positions.append(len(builder))
+                builder.add_asset(asset)
+            else:
+                new_positions.append(-1)
+            start = position + 1
+        offset = len(builder)
+        builder.add_range(self, start, len(self))
+        new_positions.extend(range(offset, offset + len(self) - start))
+
+        if removed_positions:
+            sorted_positions = array(
+                "I", [position for position in map(new_positions.__getitem__, self._sorted) if position >= 0]
+            )
+        else:
+            sorted_positions = array("I", self._sorted)
+
+        builder.add_assets(appended.values())
+        return builder.build(sorted_positions)
+
+    def remap(self, previous: AssetIndex) -> array:
+        """Map every position of a previous index to the position here, -1 if gone."""
+        positions = {
+            self._ids[offset:offset + _ID_SIZE]: position
+            for position, offset in enumerate(range(0, len(self._ids), _ID_SIZE))
+        }
+        return array(
+            "i",
+            [positions.get(previous._ids[offset:offset + _ID_SIZE], -1) for offset in range(0, len(previous._ids), _ID_SIZE)],
+        )
+
+    def _packed_id(self, position: int) -> bytes:
+        """Return the packed ID at a position."""
+        return self._ids[position * _ID_SIZE:(position + 1) * _ID_SIZE]
+
+    def _find(self, packed_id: bytes) -> int:
+        """Return the position of a packed ID, -1 if missing."""
+        i = bisect_left(self._sorted, packed_id, key=self._packed_id)
+        if i < len(self._sorted) and self._packed_id(self._sorted[i]) == packed_id:
+            return self._sorted[i]
+        return -1
+
+
+class AssetIndexBuilder:
+    """Accumulate assets page by page, keeping only what the index needs."""
+
+    def __init__(self, mime_types: list[str] | None = None) -> None:
+        """Initialize, starting from the MIME type codes of an existing index if given."""
+        self._columns = _Columns(
+            ids=bytearray(), versions=bytearray(), names=bytearray(), mime_types=list(mime_types or [""])
+        )
+        self._mime_codes = {mime_type: code for code, mime_type in enumerate(self._columns.mime_types)}
+
+    def __len__(self) -> int:
+        """Return the number of assets added so far."""
+        return len(self._columns.orientations)
+
+    def add_assets(self, assets: Iterable[dict]) -> None:
+        """Add assets from their metadata."""
+        for asset in assets:
+            self.add_asset(asset)
+
+    def add_asset(self, asset: dict) -> None:
+        """Add an asset from its metadata."""
+        columns = self._columns
+        columns.ids += uuid.UUID(asset["id"]).bytes
+
+        if (dimensions := asset_dimensions(asset)) is None:
+            columns.orientations.append(ORIENTATION_UNKNOWN)
+            columns.widths.append(0)
+            columns.heights.append(0)
+        else:
+            width, height = dimensions
+            columns.orientations.append(ORIENTATION_PORTRAIT if height > width else ORIENTATION_LANDSCAPE)
+            columns.widths.append(width)
+            columns.heights.append(height)
+
+        columns.versions += _packed_version(asset)
+        columns.file_sizes.append(int((asset.get("exifInfo") or {}).get("fileSizeInByte") or 0))
+
+        name = (asset.get("originalFileName") or "").encode()
+        if len(name) > _MAX_NAME_SIZE:
+            name = b""
+        columns.name_sizes.append(len(name))
+        columns.names += name
+        columns.mime_codes.append(self._mime_code(asset.get("originalMimeType") or ""))
+
+    def add_range(self, index: AssetIndex, start: int, stop: int) -> None:
+        """Copy the assets between two positions of another index."""
+        if start >= stop:
+            return
+
+        columns = self._columns
+        source = index._columns
+        columns.ids += source.ids[start * _ID_SIZE:stop * _ID_SIZE]
+        columns.orientations += source.orientations[start:stop]
+        columns.widths += source.widths[start:stop]
+        columns.heights += source.heights[start:stop]
+        columns.versions += source.versions[start * _VERSION_SIZE:stop * _VERSION_SIZE]
+        columns.file_sizes += source.file_sizes[start:stop]
+        columns.name_sizes += source.name_sizes[start:stop]
+        name_offsets = index._name_offsets
+        columns.names += source.names[name_offsets[start]:name_offsets[stop]]
+        if columns.mime_types[:len(source.mime_types)] == source.mime_types:
+            columns.mime_codes += source.mime_codes[start:stop]
+        else:
+            columns.mime_codes.extend(
+                self._mime_code(source.mime_types[code]) for code in source.mime_codes[start:stop]
+            )
+
+    def _mime_code(self, mime_type: str) -> int:
+        """Return the code of a MIME type, unknown once all codes are taken."""
+        if (code := self._mime_codes.get(mime_type)) is None:
+            if len(self._columns.mime_types) > 0xFF:
+                return 0
+            code = self._mime_codes[mime_type] = len(self._columns.mime_types)
+            self._columns.mime_types.append(mime_type)
+        return code
+
+    def build(self, sorted_positions: array | None = None) -> AssetIndex:
+        """Return an index of the assets added so far, see AssetIndex for sorted_positions."""
+        columns = self._columns
+        return AssetIndex(
+            _Columns(
+                ids=bytes(columns.ids),
+                orientations=array("b", columns.orientations),
+                widths=array("I", columns.widths),
+                heights=array("I", columns.heights),
+                versions=bytes(columns.versions),
+                file_sizes=array("Q", columns.file_sizes),
+                name_sizes=array("H", columns.name_sizes),
+                names=bytes(columns.names),
+                mime_codes=array("B", columns.mime_codes),
+                mime_types=list(columns.mime_types),
+            ),
+            sorted_positions,
+        )
@@ -0,0 +1,305 @@
+"""On-disk asset cache for the Immich integration."""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter, OrderedDict
+from collections.abc import Awaitable, Callable
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+import zipfile
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import CACHE_DIRECTORY, DATA_ASSET_CACHE
+
+_LOGGER = logging.getLogger(__name__)
+
+_TMP_SUFFIX = ".tmp"
+
+
+def asset_cache_key(host: str, asset_id: str, size: str, version: str) -> str:
+    """Return the content address of an asset rendition on a server."""
+    return hashlib.sha256(f"{host}|{asset_id}|{size}|{version}".encode()).hexdigest()
+
+
+@callback
+def async_get_asset_cache(hass: HomeAssistant, entry_id: str, max_bytes: int) -> AssetCache:
+    """Return the asset cache shared by all config entries, with the budget of an entry."""
+    asset_cache: AssetCache | None = hass.data.get(DATA_ASSET_CACHE)
+    if asset_cache is None:
+        asset_cache = hass.data[DATA_ASSET_CACHE] = AssetCache(
+            hass, hass.config.path(CACHE_DIRECTORY), max_bytes
+        )
+    asset_cache.async_set_budget(entry_id, max_bytes)
+    return asset_cache
+
+
+class AssetCache:
+    """Persistent asset cache bounded in bytes, with LRU eviction."""
+
+    def __init__(self, hass: HomeAssistant, path: str, max_bytes: int) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.path = path
+        self.max_bytes = max_bytes
+        # Cache key -> file size, least recently used first
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._total_bytes = 0
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._inflight: dict[str, asyncio.Task[str | None]] = {}
+        # Keys whose files are in use, never evicted until released
+        self._pins: Counter[str] = Counter()
+        # Config entry ID -> budget of each loaded entry sharing the cache
+        self._budgets: dict[str, int] = {}
+
+    @property
+    def total_bytes(self) -> int:
+        """Return the number of bytes currently cached."""
+        return self._total_bytes
+
+    def __contains__(self, key: str) -> bool:
+        """Return whether the key is cached, without touching the disk."""
+        return key in self._index
+
+    async def async_load(self) -> None:
+        """Rebuild the in-memory index from the cache directory, once."""
+        if self._loaded:
+            return
+
+        async with self._load_lock:
+            if self._loaded:
+                return
+
+            for key, size in await self.hass.async_add_executor_job(self._scan):
+                self._index[key] = size
+                self._total_bytes += size
+            self._loaded = True
+
+            _LOGGER.info(
+                "Loaded asset cache index: %d assets, %d bytes", len(self._index), self._total_bytes
+            )
+
+        await self._async_evict()
+
+    @callback
+    def async_set_budget(self, entry_id: str, max_bytes: int) -> None:
+        """Set the budget of a loaded config entry."""
+        self._budgets[entry_id] = max_bytes
+        self._update_budget()
+
+    @callback
+    def async_remove_budget(self, entry_id: str) -> None:
+        """Forget the budget of an unloaded config entry."""
+        self._budgets.pop(entry_id, None)
+        self._update_budget()
+
+    @callback
+    def _update_budget(self) -> None:
+        """Honour the most generous budget of the loaded entries, evicting down to it if it shrank."""
+        if not self._budgets:
+            return
+
+        max_bytes = max(self._budgets.values())
+        shrunk = max_bytes < self.max_bytes
+        self.max_bytes = max_bytes
+        if shrunk and self._loaded:
+            self.hass.async_create_background_task(self._async_evict(), "immich cache eviction")
+
+    def file_size(self, key: str) -> int:
+        """Return the size of the cached file for the key, 0 if not cached."""
+        return self._index.get(key, 0)
+
+    async def async_get_path(self, key: str) -> str | None:
+        """Return the path of the cached file for the key, if any."""
+        await self.async_load()
+
+        if key not in self._index:
+            return None
+
+        self._index.move_to_end(key)
+        return self._filename(key)
+
+    async def async_get_or_fetch_path(
+        self, key: str, fetch: Callable[[str], Awaitable[bool]], pin: bool = False
+    ) -> str | None:
+        """Return the cached file for the key, fetching it into the cache once if missing.
+
+        The fetch callable writes the data to the file name it is given and returns
+        whether it succeeded, so downloads go to disk without being held in memory.
+        With pin, the file is kept from eviction until release_path is called with it.
+        """
+        if (path := await self.async_get_path(key)) is None:
+            # Concurrent requests for the same asset share a single download
+            if (task := self._inflight.get(key)) is None:
+                task = self._inflight[key] = self.hass.async_create_task(
+                    self._async_fetch_to_file(key, fetch)
+                )
+            path = await asyncio.shield(task)
+
+        # Other downloads may have evicted it while this one waited
+        if path is None or key not in self._index:
+            return None
+        if pin:
+            self._pins[key] += 1
+        return path
+
+    @callback
+    def release_path(self, path: str) -> None:
+        """Allow the file of a path returned with pin to be evicted again."""
+        key = os.path.basename(path)
+        self._pins[key] -= 1
+        if self._pins[key] <= 0:
+            del self._pins[key]
+
+    async def _async_fetch_to_file(
+        self, key: str, fetch: Callable[[str], Awaitable[bool]]
+    ) -> str | None:
+        """Fetch into a temporary file and move it into the cache."""
+        tmp_filename = self._filename(f"{key}.{uuid.uuid4().hex}{_TMP_SUFFIX}")
+        try:
+            if not await fetch(tmp_filename):
+                return None
+            if not (size := await self.hass.async_add_executor_job(self._commit, tmp_filename, key)):
+                return None
+        except OSError as e:
+            _LOGGER.error("Unable to cache asset: %s %s", key, e)
+            return None
+        finally:
+            self._inflight.pop(key, None)
+            await self.hass.async_add_executor_job(self._remove_tmp, tmp_filename)
+
+        self._drop(key)
+        self._index[key] = size
+        self._total_bytes += size
+
+        # Kept even if larger than the whole cache, the next stored asset evicts it
+        await self._async_evict(keep=key)
+
+        return self._filename(key)
+
+    async def async_put_archive(
+        self, fetch: Callable[[str], Awaitable[bool]], keys_by_member: dict[str, str]
+    ) -> dict[str, int]:
+        """Fetch a zip archive and store its members under their keys, returning the stored sizes.
+
+        Members without a key are skipped. The archive itself only lives on disk until unpacked.
+        """
+        await self.async_load()
+
+        tmp_filename = self._filename(f"archive.{uuid.uuid4().hex}{_TMP_SUFFIX}")
+        try:
+            if not await fetch(tmp_filename):
+                return {}
+            stored = await self.hass.async_add_executor_job(
+                self._extract_archive, tmp_filename, keys_by_member
+            )
+        except (OSError, zipfile.BadZipFile) as e:
+            _LOGGER.error("Unable to unpack asset archive: %s", e)
+            return {}
+        finally:
+            await self.hass.async_add_executor_job(self._remove_tmp, tmp_filename)
+
+        for key, size in stored.items():
+            self._drop(key)
+            self._index[key] = size
+            self._total_bytes += size
+
+        await self._async_evict()
+
+        return stored
+
+    def _drop(self, key: str) -> None:
+        """Forget a key without touching the disk."""
+        size = self._index.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    async def _async_evict(self, keep: str | None = None) -> None:
+        """Remove least recently used entries until the cache fits its budget.
+
+        Pinned entries and keep are never removed, even if the cache stays over budget.
+        """
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        evicted: list[str] = []
+        for key, size in list(self._index.items()):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if key == keep or self._pins[key]:
+                continue
+            del self._index[key]
+            self._total_bytes -= size
+            evicted.append(key)
+
+        if evicted:
+            _LOGGER.debug("Evicting %d assets from cache", len(evicted))
+            await self.hass.async_add_executor_job(self._remove_files, evicted)
+
+    def _filename(self, key: str) -> str:
+        """Return the path of the file backing a key."""
+        return os.path.join(self.path, key)
+
+    def _scan(self) -> list[tuple[str, int]]:
+        """List cached files, oldest first. Runs in the executor."""
+        os.makedirs(self.path, exist_ok=True)
+
+        entries: list[tuple[float, str, int]] = []
+        with os.scandir(self.path) as it:
+            for entry in it:
+                if not entry.is_file():
+                    continue
+                if entry.name.endswith(_TMP_SUFFIX):
+                    # Left over from an interrupted write
+                    os.remove(entry.path)
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+
+        entries.sort()
+        return [(name, size) for _, name, size in entries]
+
+    def _commit(self, tmp_filename: str, key: str) -> int:
+        """Move a fully written temporary file into place, unless empty. Runs in the executor."""
+        if not (size := os.path.getsize(tmp_filename)):
+            return 0
+        os.replace(tmp_filename, self._filename(key))
+        return size
+
+    def _extract_archive(self, archive_filename: str, keys_by_member: dict[str, str]) -> dict[str, int]:
+        """Move the members of a zip archive into place. Runs in the executor."""
+        stored: dict[str, int] = {}
+        with zipfile.ZipFile(archive_filename) as archive:
+            for info in archive.infolist():
+                key = keys_by_member.get(info.filename)
+                if key is None or not info.file_size:
+                    continue
+
+                tmp_filename = self._filename(f"{key}.{uuid.uuid4().hex}{_TMP_SUFFIX}")
+                try:
+                    with archive.open(info) as src, open(tmp_filename, "wb") as dst:
+                        shutil.copyfileobj(src, dst)
+                    os.replace(tmp_filename, self._filename(key))
+                finally:
+                    self._remove_tmp(tmp_filename)
+                stored[key] = info.file_size
+        return stored
+
+    def _remove_tmp(self, tmp_filename: str) -> None:
+        """Delete a temporary file left by a failed fetch. Runs in the executor."""
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+
+    def _remove_files(self, keys: list[str]) -> None:
+        """Delete the files backing the keys. Runs in the executor."""
+        for key in keys:
+            try:
+                os.remove(self._filename(key))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                _LOGGER.error("Unable to remove cached asset: %s %s", key, e)
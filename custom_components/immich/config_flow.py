@@ -28,11 +28,61 @@ from .const import (
     CROP_MODES,
     IMAGE_SELECTION_MODES,
     UPDATE_INTERVAL_UNITS,
+    CONF_UPDATE_JITTER,
+    DEFAULT_UPDATE_JITTER,
+    UPDATE_JITTER_VALIDATOR,
+    CONF_DEMAND_MODE,
+    DEFAULT_DEMAND_MODE,
+    CONF_DEMAND_IDLE_TIMEOUT,
+    DEFAULT_DEMAND_IDLE_TIMEOUT,
+    DEMAND_IDLE_TIMEOUT_VALIDATOR,
     CONF_CACHE_MODE,
     DEFAULT_CACHE_MODE,
     CONF_PICTURE_TYPE,
     DEFAULT_PICTURE_TYPE,
-    PICTURE_TYPES
+    PICTURE_TYPES,
+    CONF_REQUEST_TIMEOUT,
+    DEFAULT_REQUEST_TIMEOUT,
+    REQUEST_TIMEOUT_VALIDATOR,
+    CONF_RENDER_POOL,
+    DEFAULT_RENDER_POOL,
+    RENDER_POOLS,
+    CONF_RENDER_PROFILE,
+    DEFAULT_RENDER_PROFILE,
+    RENDER_PROFILES,
+    CONF_OUTPUT_WIDTH,
+    DEFAULT_OUTPUT_WIDTH,
+    OUTPUT_WIDTH_VALIDATOR,
+    CONF_OUTPUT_HEIGHT,
+    DEFAULT_OUTPUT_HEIGHT,
+    OUTPUT_HEIGHT_VALIDATOR,
+    CONF_OUTPUT_FORMAT,
+    DEFAULT_OUTPUT_FORMAT,
+    OUTPUT_FORMATS,
+    CONF_MAX_CONCURRENT_RENDERS,
+    DEFAULT_MAX_CONCURRENT_RENDERS,
+    MAX_CONCURRENT_RENDERS_VALIDATOR,
+    CONF_MAX_CONCURRENT_DOWNLOADS,
+    DEFAULT_MAX_CONCURRENT_DOWNLOADS,
+    MAX_CONCURRENT_DOWNLOADS_VALIDATOR,
+    CONF_PREFETCH_SLIDES,
+    DEFAULT_PREFETCH_SLIDES,
+    PREFETCH_SLIDES_VALIDATOR,
+    CONF_PREFETCH_BUDGET,
+    DEFAULT_PREFETCH_BUDGET,
+    PREFETCH_BUDGET_VALIDATOR,
+    CONF_CACHE_MAX_SIZE,
+    DEFAULT_CACHE_MAX_SIZE,
+    CACHE_MAX_SIZE_VALIDATOR,
+    CONF_BULK_CACHE_WARM,
+    DEFAULT_BULK_CACHE_WARM,
+    CONF_INCREMENTAL_SYNC,
+    DEFAULT_INCREMENTAL_SYNC,
+    CONF_REALTIME_EVENTS,
+    DEFAULT_REALTIME_EVENTS,
+    CONF_PAGE_SIZE,
+    DEFAULT_PAGE_SIZE,
+    PAGE_SIZE_VALIDATOR
 )
 from .hub import CannotConnect, ImmichHub, InvalidAuth
 
@@ -52,10 +102,14 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
 
     hub = ImmichHub(host=url, api_key=api_key, hass=hass, config_entry=None)
 
-    if not await hub.authenticate():
-        raise InvalidAuth
+    try:
+        if not await hub.authenticate():
+            raise InvalidAuth
+
+        user_info = await hub.get_my_user_info()
+    finally:
+        await hub.async_close()
 
-    user_info = await hub.get_my_user_info()
     username = user_info["name"]
     clean_hostname = urlparse(url).hostname
 
@@ -117,10 +171,14 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         api_key = self.config_entry.data[CONF_API_KEY]
         hub = ImmichHub(host=url, api_key=api_key, hass=None, config_entry=self.config_entry)
 
-        if not await hub.authenticate():
-            raise InvalidAuth
+        try:
+            if not await hub.authenticate():
+                raise InvalidAuth
+
+            albums = await hub.list_all_albums()
+        finally:
+            await hub.async_close()
 
-        albums = await hub.list_all_albums()
         album_map = {album["id"]: album["albumName"] for album in albums}
 
         current_albums_value = [
@@ -133,9 +191,27 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         current_image_selection_mode = self.config_entry.options.get(CONF_IMAGE_SELECTION_MODE, DEFAULT_IMAGE_SELECTION_MODE)
         current_update_interval = self.config_entry.options.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)
         current_update_interval_unit = self.config_entry.options.get(CONF_UPDATE_INTERVAL_UNIT, DEFAULT_UPDATE_INTERVAL_UNIT)
+        current_update_jitter = self.config_entry.options.get(CONF_UPDATE_JITTER, DEFAULT_UPDATE_JITTER)
+        current_demand_mode = self.config_entry.options.get(CONF_DEMAND_MODE, DEFAULT_DEMAND_MODE)
+        current_demand_idle_timeout = self.config_entry.options.get(CONF_DEMAND_IDLE_TIMEOUT, DEFAULT_DEMAND_IDLE_TIMEOUT)
 
+        current_incremental_sync = self.config_entry.options.get(CONF_INCREMENTAL_SYNC, DEFAULT_INCREMENTAL_SYNC)
+        current_realtime_events = self.config_entry.options.get(CONF_REALTIME_EVENTS, DEFAULT_REALTIME_EVENTS)
+        current_page_size = self.config_entry.options.get(CONF_PAGE_SIZE, DEFAULT_PAGE_SIZE)
         current_cache_mode = self.config_entry.options.get(CONF_CACHE_MODE, DEFAULT_CACHE_MODE)
+        current_cache_max_size = self.config_entry.options.get(CONF_CACHE_MAX_SIZE, DEFAULT_CACHE_MAX_SIZE)
+        current_bulk_cache_warm = self.config_entry.options.get(CONF_BULK_CACHE_WARM, DEFAULT_BULK_CACHE_WARM)
         current_picture_type = self.config_entry.options.get(CONF_PICTURE_TYPE, DEFAULT_PICTURE_TYPE)
+        current_request_timeout = self.config_entry.options.get(CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT)
+        current_max_concurrent_downloads = self.config_entry.options.get(CONF_MAX_CONCURRENT_DOWNLOADS, DEFAULT_MAX_CONCURRENT_DOWNLOADS)
+        current_prefetch_slides = self.config_entry.options.get(CONF_PREFETCH_SLIDES, DEFAULT_PREFETCH_SLIDES)
+        current_prefetch_budget = self.config_entry.options.get(CONF_PREFETCH_BUDGET, DEFAULT_PREFETCH_BUDGET)
+        current_render_pool = self.config_entry.options.get(CONF_RENDER_POOL, DEFAULT_RENDER_POOL)
+        current_max_concurrent_renders = self.config_entry.options.get(CONF_MAX_CONCURRENT_RENDERS, DEFAULT_MAX_CONCURRENT_RENDERS)
+        current_render_profile = self.config_entry.options.get(CONF_RENDER_PROFILE, DEFAULT_RENDER_PROFILE)
+        current_output_width = self.config_entry.options.get(CONF_OUTPUT_WIDTH, DEFAULT_OUTPUT_WIDTH)
+        current_output_height = self.config_entry.options.get(CONF_OUTPUT_HEIGHT, DEFAULT_OUTPUT_HEIGHT)
+        current_output_format = self.config_entry.options.get(CONF_OUTPUT_FORMAT, DEFAULT_OUTPUT_FORMAT)
 
         options_schema = vol.Schema(
             {
@@ -143,9 +219,27 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 vol.Required(CONF_IMAGE_SELECTION_MODE, default=current_image_selection_mode): vol.In(IMAGE_SELECTION_MODES),
                 vol.Required(CONF_UPDATE_INTERVAL, default=current_update_interval): vol.Coerce(int),
                 vol.Required(CONF_UPDATE_INTERVAL_UNIT, default=current_update_interval_unit): vol.In(UPDATE_INTERVAL_UNITS),
+                vol.Required(CONF_UPDATE_JITTER, default=current_update_jitter): UPDATE_JITTER_VALIDATOR,
+                vol.Required(CONF_DEMAND_MODE, default=current_demand_mode): bool,
+                vol.Required(CONF_DEMAND_IDLE_TIMEOUT, default=current_demand_idle_timeout): DEMAND_IDLE_TIMEOUT_VALIDATOR,
                 vol.Required(CONF_WATCHED_ALBUMS, default=current_albums_value): cv.multi_select(album_map),
+                vol.Required(CONF_INCREMENTAL_SYNC, default=current_incremental_sync): bool,
+                vol.Required(CONF_REALTIME_EVENTS, default=current_realtime_events): bool,
+                vol.Required(CONF_PAGE_SIZE, default=current_page_size): PAGE_SIZE_VALIDATOR,
                 vol.Required(CONF_PICTURE_TYPE, default=current_picture_type): vol.In(PICTURE_TYPES),
                 vol.Required(CONF_CACHE_MODE, default=current_cache_mode): bool,
+                vol.Required(CONF_CACHE_MAX_SIZE, default=current_cache_max_size): CACHE_MAX_SIZE_VALIDATOR,
+                vol.Required(CONF_BULK_CACHE_WARM, default=current_bulk_cache_warm): bool,
+                vol.Required(CONF_REQUEST_TIMEOUT, default=current_request_timeout): REQUEST_TIMEOUT_VALIDATOR,
+                vol.Required(CONF_MAX_CONCURRENT_DOWNLOADS, default=current_max_concurrent_downloads): MAX_CONCURRENT_DOWNLOADS_VALIDATOR,
+                vol.Required(CONF_PREFETCH_SLIDES, default=current_prefetch_slides): PREFETCH_SLIDES_VALIDATOR,
+                vol.Required(CONF_PREFETCH_BUDGET, default=current_prefetch_budget): PREFETCH_BUDGET_VALIDATOR,
+                vol.Required(CONF_RENDER_POOL, default=current_render_pool): vol.In(RENDER_POOLS),
+                vol.Required(CONF_MAX_CONCURRENT_RENDERS, default=current_max_concurrent_renders): MAX_CONCURRENT_RENDERS_VALIDATOR,
+                vol.Required(CONF_RENDER_PROFILE, default=current_render_profile): vol.In(RENDER_PROFILES),
+                vol.Required(CONF_OUTPUT_WIDTH, default=current_output_width): OUTPUT_WIDTH_VALIDATOR,
+                vol.Required(CONF_OUTPUT_HEIGHT, default=current_output_height): OUTPUT_HEIGHT_VALIDATOR,
+                vol.Required(CONF_OUTPUT_FORMAT, default=current_output_format): vol.In(OUTPUT_FORMATS),
             }
         )
 
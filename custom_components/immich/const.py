@@ -1,10 +1,37 @@
 """Constants for the immich integration."""
 
+from datetime import timedelta
+
 import voluptuous as vol
 
 DOMAIN = "immich"
 CONF_WATCHED_ALBUMS = "watched_albums"
 
+# Asset List Constants
+FAVORITES_SOURCE = "favorites"
+ASSET_LIST_REFRESH_INTERVAL = timedelta(hours=1)
+CONF_REALTIME_EVENTS = "realtime_events"
+DEFAULT_REALTIME_EVENTS = False
+# With real-time events, polling is only a consistency check
+EVENTS_REFRESH_INTERVAL = timedelta(hours=24)
+EVENTS_RECONNECT_MIN = 5  # in seconds, doubled after every failed connection
+EVENTS_RECONNECT_MAX = 300  # in seconds
+# A connection counts as established, resetting the backoff and resyncing, once up this long
+EVENTS_STABLE_AFTER = 60  # in seconds
+EVENTS_BATCH_DELAY = 2  # in seconds, events within this window are applied in one pass
+CONF_INCREMENTAL_SYNC = "incremental_sync"
+DEFAULT_INCREMENTAL_SYNC = True
+CONF_PAGE_SIZE = "page_size"
+DEFAULT_PAGE_SIZE = 250
+
+# Storage Constants
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.{{entry_id}}"
+STORAGE_SAVE_DELAY = 30  # in seconds, changes within this window are written at once
+# Slideshow positions change with every slide, so they are kept apart from the asset indexes
+SLIDESHOW_STORAGE_KEY = f"{DOMAIN}.{{entry_id}}.slideshow"
+SLIDESHOW_SAVE_DELAY = 300  # in seconds
+
 # Crop Mode Constants
 CROP_MODES = ["Combine images", "Crop single image", "None"]
 CONF_CROP_MODE = "crop_mode"
@@ -21,13 +48,127 @@ CONF_UPDATE_INTERVAL_UNIT = "update_interval_unit"
 DEFAULT_UPDATE_INTERVAL = 60  # in seconds
 DEFAULT_UPDATE_INTERVAL_UNIT = "seconds"
 UPDATE_INTERVAL_UNITS = ["seconds", "minutes"]
+# Entity refreshes are spread evenly over the interval, each delayed by up to this share of the spacing
+CONF_UPDATE_JITTER = "update_jitter"
+DEFAULT_UPDATE_JITTER = 0  # in percent
+# In demand mode, updates pause once no client has fetched the image for the idle timeout
+CONF_DEMAND_MODE = "demand_mode"
+DEFAULT_DEMAND_MODE = False
+CONF_DEMAND_IDLE_TIMEOUT = "demand_idle_timeout"
+DEFAULT_DEMAND_IDLE_TIMEOUT = 10  # in minutes
 
 CONF_CACHE_MODE = "cache_mode"
 DEFAULT_CACHE_MODE = False
+CONF_CACHE_MAX_SIZE = "cache_max_size"
+DEFAULT_CACHE_MAX_SIZE = 1024  # in MB
+CACHE_DIRECTORY = "immich_cache"
+DATA_ASSET_CACHE = f"{DOMAIN}_asset_cache"
+CACHE_WARM_THROTTLE = 0.2  # in seconds, pause between background cache downloads
+CONF_BULK_CACHE_WARM = "bulk_cache_warm"
+DEFAULT_BULK_CACHE_WARM = False
+BULK_ARCHIVE_SIZE = 64 * 1024 * 1024  # in bytes, the most Immich packs into one archive
+# Archives take longer than the request timeout, so only a stalled read fails them
+ARCHIVE_READ_TIMEOUT = 60  # in seconds
 
-PICTURE_TYPES = ["preview", "fullsize"]
+PICTURE_TYPES = ["auto", "preview", "fullsize"]
 CONF_PICTURE_TYPE = "picture_type"
 DEFAULT_PICTURE_TYPE = "preview"
+PREVIEW_LONG_EDGE = 1440  # in pixels, the default size of Immich preview thumbnails
+
+# HTTP Client Constants
+CONF_REQUEST_TIMEOUT = "request_timeout"
+DEFAULT_REQUEST_TIMEOUT = 30  # in seconds
+CONNECT_TIMEOUT = 10  # in seconds
+CONNECTION_LIMIT = 32
+CONNECTION_LIMIT_PER_HOST = 8
+DNS_CACHE_TTL = 300  # in seconds
+KEEPALIVE_TIMEOUT = 60  # in seconds
+
+# Download Constants
+CONF_MAX_CONCURRENT_DOWNLOADS = "max_concurrent_downloads"
+DEFAULT_MAX_CONCURRENT_DOWNLOADS = 4
+DOWNLOAD_CHUNK_SIZE = 256 * 1024  # in bytes, streamed to the cache file at a time
+
+# Rendering Constants
+CONF_RENDER_POOL = "render_pool"
+RENDER_POOLS = ["thread", "process"]
+DEFAULT_RENDER_POOL = "thread"
+CONF_MAX_CONCURRENT_RENDERS = "max_concurrent_renders"
+DEFAULT_MAX_CONCURRENT_RENDERS = 2
+MAX_PENDING_RENDERS_PER_WORKER = 2
+MAX_HELD_PORTRAIT_BYTES = 8 * 1024 * 1024  # decoded pixels kept per entity while waiting for a pair
+CONF_RENDER_PROFILE = "render_profile"
+RENDER_PROFILES = ["quality", "balanced", "fast"]
+DEFAULT_RENDER_PROFILE = "quality"
+# Resample filter used for resizing, by render profile
+RENDER_PROFILE_RESAMPLE = {"quality": "LANCZOS", "balanced": "BICUBIC", "fast": "BILINEAR"}
+
+# Output Constants
+CONF_OUTPUT_WIDTH = "output_width"
+DEFAULT_OUTPUT_WIDTH = 2048
+CONF_OUTPUT_HEIGHT = "output_height"
+DEFAULT_OUTPUT_HEIGHT = 1536
+CONF_OUTPUT_FORMAT = "output_format"
+OUTPUT_FORMATS = ["JPEG", "Progressive JPEG", "WEBP"]
+DEFAULT_OUTPUT_FORMAT = "JPEG"
+OUTPUT_CONTENT_TYPES = {"JPEG": "image/jpeg", "Progressive JPEG": "image/jpeg", "WEBP": "image/webp"}
+# Encoder settings, by Pillow format and render profile
+ENCODE_PROFILES = {
+    "JPEG": {
+        "quality": {"quality": 95, "optimize": True},
+        "balanced": {"quality": 85, "optimize": True},
+        "fast": {"quality": 80},
+    },
+    "WEBP": {
+        "quality": {"quality": 90, "method": 6},
+        "balanced": {"quality": 80, "method": 4},
+        "fast": {"quality": 75, "method": 0},
+    },
+}
+
+# Rendition Constants
+RENDITION_WIDTHS = [640, 1280, 2048]
+RENDITION_URL = f"/api/{DOMAIN}/rendition/{{entity_id}}"
+DATA_RENDITION_ENTITIES = f"{DOMAIN}_rendition_entities"
+
+# Prefetch Constants
+CONF_PREFETCH_SLIDES = "prefetch_slides"
+DEFAULT_PREFETCH_SLIDES = 1
+CONF_PREFETCH_BUDGET = "prefetch_budget"
+DEFAULT_PREFETCH_BUDGET = 8  # in MB
 
 # Validation for update interval (min=1 second, max=24 hours)
 UPDATE_INTERVAL_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=1, max=86400))
+
+# Validation for update jitter (min=0 to disable, max=100 percent)
+UPDATE_JITTER_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=0, max=100))
+
+# Validation for demand idle timeout (min=1 minute, max=24 hours)
+DEMAND_IDLE_TIMEOUT_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=1, max=1440))
+
+# Validation for request timeout (min=5 seconds, max=5 minutes)
+REQUEST_TIMEOUT_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=5, max=300))
+
+# Validation for concurrent renders (min=1, max=8 workers)
+MAX_CONCURRENT_RENDERS_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=1, max=8))
+
+# Validation for concurrent downloads (min=1, max=16 requests)
+MAX_CONCURRENT_DOWNLOADS_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=1, max=16))
+
+# Validation for output width (min=320, max=7680 pixels)
+OUTPUT_WIDTH_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=320, max=7680))
+
+# Validation for output height (min=240, max=4320 pixels)
+OUTPUT_HEIGHT_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=240, max=4320))
+
+# Validation for prefetched slides (min=0 to disable, max=10 slides)
+PREFETCH_SLIDES_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=0, max=10))
+
+# Validation for prefetch budget (min=1 MB, max=256 MB)
+PREFETCH_BUDGET_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=1, max=256))
+
+# Validation for cache size (min=16 MB, max=1 TB)
+CACHE_MAX_SIZE_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=16, max=1048576))
+
+# Validation for search page size (min=50, max=1000 assets, the Immich limit)
+PAGE_SIZE_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=50, max=1000))
@@ -1,15 +1,22 @@
 from PIL import Image, ImageOps
+from contextlib import contextmanager
 from io import BytesIO
-from typing import List, Tuple
+from typing import IO, Iterator, List, Optional, Tuple, Union
 import logging
+import mmap
 
 Image.MAX_IMAGE_PIXELS = None
 import requests
 
-_LOGGER = logging.getLogger(__name__)
+from .const import (
+    DEFAULT_OUTPUT_FORMAT,
+    DEFAULT_RENDER_PROFILE,
+    ENCODE_PROFILES,
+    MAX_HELD_PORTRAIT_BYTES,
+    RENDER_PROFILE_RESAMPLE,
+)
 
-# Global variable to store a held portrait image
-held_portrait_image = None
+_LOGGER = logging.getLogger(__name__)
 
 def fetch_image_from_immich(image_url: str) -> Image.Image:
     """Fetches an image from the Immich API."""
@@ -56,12 +63,56 @@ def correct_image_orientation(image: Image.Image) -> Image.Image:
         _LOGGER.warning("EXIF data not available or incomplete. Using original image orientation.")
         return image
 
-def combine_portrait_images(images: List[Image.Image], width: int, height: int) -> Image.Image:
+@contextmanager
+def open_image_source(source: Union[bytes, str]) -> Iterator[IO[bytes]]:
+    """Opens downloaded bytes, or memory-maps a cache file so it is decoded without being copied."""
+    if isinstance(source, bytes):
+        yield BytesIO(source)
+        return
+
+    with open(source, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        yield buffer
+
+def open_image_for_box(
+    source: Union[bytes, str], width: int, height: int, crop_mode: str = "Combine images"
+) -> Image.Image:
+    """
+    Opens an image and corrects its orientation, decoding JPEGs at the smallest DCT scale
+    that still covers the box the image will be drawn into.
+    """
+    with open_image_source(source) as fp:
+        image = Image.open(fp)
+        _draft_for_box(image, width, height, crop_mode)
+        # Decode while the source is still open
+        image.load()
+
+    return correct_image_orientation(image)
+
+def _draft_for_box(image: Image.Image, width: int, height: int, crop_mode: str) -> None:
+    """Asks the JPEG decoder for the smallest DCT scale that covers the box."""
+    if image.format == "JPEG":
+        # The header is parsed already, so size and EXIF are known before any pixel is decoded
+        orientation = image.getexif().get(274, 1)
+        rotated = orientation in (5, 6, 7, 8)
+        displayed_width, displayed_height = (image.height, image.width) if rotated else image.size
+
+        if crop_mode == "Combine images" and displayed_height > displayed_width:
+            box = (width // 2, height)
+        else:
+            box = (width, height)
+
+        if rotated:
+            box = (box[1], box[0])
+        image.draft(None, box)
+
+def combine_portrait_images(
+    images: List[Image.Image], width: int, height: int, resample: Image.Resampling = Image.Resampling.LANCZOS
+) -> Image.Image:
     """Combines two portrait images side-by-side into a single image, vertically centered."""
     assert len(images) >= 2, "This function expects at least two images"
     
     # Resize images to fit within half the width and full height
-    resized_images = [ImageOps.contain(img, (width // 2, height), Image.Resampling.LANCZOS) for img in images[:2]]
+    resized_images = [ImageOps.contain(img, (width // 2, height), resample) for img in images[:2]]
 
     combined_image = Image.new('RGB', (width, height))
 
@@ -72,24 +123,44 @@ def combine_portrait_images(images: List[Image.Image], width: int, height: int)
 
     return combined_image
 
-def process_single_image(image: Image.Image, width: int, height: int) -> Image.Image:
+def shrink_held_portrait(
+    image: Image.Image, width: int, height: int, resample: Image.Resampling = Image.Resampling.LANCZOS
+) -> Image.Image:
+    """Downscale a portrait to the half-canvas slot it will fill, within the per-entity memory cap."""
+    slot = (width // 2, height)
+    if image.width > slot[0] or image.height > slot[1]:
+        image = ImageOps.contain(image, slot, resample)
+
+    image_bytes = image.width * image.height * len(image.getbands())
+    if image_bytes > MAX_HELD_PORTRAIT_BYTES:
+        scale = (MAX_HELD_PORTRAIT_BYTES / image_bytes) ** 0.5
+        image = image.resize(
+            (max(1, int(image.width * scale)), max(1, int(image.height * scale))),
+            resample
+        )
+
+    return image
+
+def process_single_image(
+    image: Image.Image, width: int, height: int, resample: Image.Resampling = Image.Resampling.LANCZOS
+) -> Image.Image:
     """Process a single image, ensuring it's not cut off."""
-    return ImageOps.contain(image, (width, height), Image.Resampling.LANCZOS)
+    return ImageOps.contain(image, (width, height), resample)
 
 def process_images_for_slideshow(
-    image_bytes_list: List[bytes], 
+    image_sources: List[Union[bytes, str]], 
     width: int, 
     height: int, 
     crop_mode: str = "Combine images",
-    image_selection_mode: str = "Random"
-) -> Tuple[Image.Image, bool]:
+    image_selection_mode: str = "Random",
+    held_portrait_image: Optional[Image.Image] = None,
+    resample: Image.Resampling = Image.Resampling.LANCZOS
+) -> Tuple[Optional[Image.Image], bool, Optional[Image.Image]]:
     """
     Processes images for the slideshow, applying crop or combining as needed.
-    Returns a tuple of (processed_image, is_combined).
+    Returns a tuple of (processed_image, is_combined, held_portrait_image).
     """
-    global held_portrait_image
-    
-    images = [correct_image_orientation(Image.open(BytesIO(image_bytes))) for image_bytes in image_bytes_list]
+    images = [open_image_for_box(source, width, height, crop_mode) for source in image_sources]
     
     _LOGGER.debug(f"Processing {len(images)} images. Crop mode: {crop_mode}, Selection mode: {image_selection_mode}")
     
@@ -103,20 +174,74 @@ def process_images_for_slideshow(
             portrait_images.insert(0, held_portrait_image)
         
         if len(portrait_images) >= 2:
-            held_portrait_image = None
-            return combine_portrait_images(portrait_images[:2], width, height), True
+            return combine_portrait_images(portrait_images[:2], width, height, resample), True, None
         elif len(portrait_images) == 1:
-            held_portrait_image = portrait_images[0]
+            # Only keep a copy sized for the slot it will fill, not the decoded original
+            held_portrait_image = shrink_held_portrait(portrait_images[0], width, height, resample)
             landscape_images = [img for img in images if not is_portrait(img)]
             if landscape_images:
-                return process_single_image(landscape_images[0], width, height), False
+                return process_single_image(landscape_images[0], width, height, resample), False, held_portrait_image
             else:
                 # If no landscape image is available, return None to indicate no image should be displayed
-                return None, False
+                return None, False, held_portrait_image
         else:
             # Only landscape images available
-            return process_single_image(images[0], width, height), False
+            return process_single_image(images[0], width, height, resample), False, held_portrait_image
     elif crop_mode == "Crop single image":
-        return ImageOps.fit(images[0], (width, height), Image.Resampling.LANCZOS), False
+        return ImageOps.fit(images[0], (width, height), resample), False, held_portrait_image
     else:  # "None" mode
-        return process_single_image(images[0], width, height), False
+        return process_single_image(images[0], width, height, resample), False, held_portrait_image
+
+def render_slideshow_image(
+    image_sources: List[Union[bytes, str]],
+    width: int,
+    height: int,
+    crop_mode: str,
+    image_selection_mode: str,
+    held_portrait_image: Optional[Image.Image] = None,
+    render_profile: str = DEFAULT_RENDER_PROFILE,
+    output_format: str = DEFAULT_OUTPUT_FORMAT
+) -> Tuple[Optional[bytes], bool, Optional[Image.Image]]:
+    """
+    Runs the whole render pipeline: decode, orientation, resize and encode.
+    Meant to be run in a worker pool, so it only takes and returns picklable values.
+    Image sources are downloaded bytes or paths of asset cache files.
+    Returns a tuple of (encoded_bytes, is_combined, held_portrait_image).
+    """
+    resample = Image.Resampling[RENDER_PROFILE_RESAMPLE.get(render_profile, "LANCZOS")]
+    processed_image, is_combined, held_portrait_image = process_images_for_slideshow(
+        image_sources, width, height, crop_mode, image_selection_mode, held_portrait_image, resample
+    )
+
+    if processed_image is None:
+        return None, False, held_portrait_image
+
+    # Convert to RGB if the image is in RGBA mode
+    if processed_image.mode == 'RGBA':
+        processed_image = processed_image.convert('RGB')
+
+    return encode_image(processed_image, output_format, render_profile), is_combined, held_portrait_image
+
+def render_rendition(
+    image_bytes: bytes, width: int, output_format: str, render_profile: str = DEFAULT_RENDER_PROFILE
+) -> bytes:
+    """Scales an encoded slide down to a rendition width and encodes it again."""
+    image = Image.open(BytesIO(image_bytes))
+    height = max(1, image.height * width // image.width)
+    image.draft(None, (width, height))
+
+    resample = Image.Resampling[RENDER_PROFILE_RESAMPLE.get(render_profile, "LANCZOS")]
+    image = image.convert("RGB").resize((width, height), resample)
+    return encode_image(image, output_format, render_profile)
+
+def encode_image(image: Image.Image, output_format: str, render_profile: str = DEFAULT_RENDER_PROFILE) -> bytes:
+    """Encodes an image in the output format, with the encoder effort of the render profile."""
+    image_format = "WEBP" if output_format == "WEBP" else "JPEG"
+    profiles = ENCODE_PROFILES[image_format]
+    params = dict(profiles.get(render_profile, profiles[DEFAULT_RENDER_PROFILE]))
+    if output_format == "Progressive JPEG":
+        params["progressive"] = True
+
+    with BytesIO() as output:
+        image.save(output, format=image_format, **params)
+        return output.getvalue()
@@ -0,0 +1,149 @@
+"""Real-time asset events from the Immich server."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+import json
+import logging
+from typing import Any
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .asset_coordinator import ImmichAssetCoordinator
+from .const import EVENTS_RECONNECT_MAX, EVENTS_RECONNECT_MIN, EVENTS_STABLE_AFTER
+from .hub import CannotConnect, ImmichHub
+
+_LOGGER = logging.getLogger(__name__)
+
+# Engine.IO and Socket.IO packet prefixes
+_EIO_OPEN = "0"
+_EIO_PING = "2"
+_EIO_PONG = "3"
+_SIO_CONNECT = "40"
+_SIO_DISCONNECT = "41"
+_SIO_EVENT = "42"
+_SIO_CONNECT_ERROR = "44"
+
+
+class ImmichEventListener:
+    """Follow the Immich event stream and apply asset changes to the asset lists.
+
+    Immich pushes events over socket.io, spoken here directly on top of an aiohttp websocket.
+    """
+
+    def __init__(self, hass: HomeAssistant, hub: ImmichHub, coordinator: ImmichAssetCoordinator) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.hub = hub
+        self.coordinator = coordinator
+        self._task: asyncio.Task | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Start listening in the background, reconnecting until stopped."""
+        if self._task is None:
+            self._task = self.hass.async_create_background_task(self._async_run(), "immich events")
+
+    async def async_stop(self) -> None:
+        """Stop listening."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _async_run(self) -> None:
+        """Keep a connection open, backing off after failures.
+
+        A server that accepts and then drops the connection counts as a failure, so only
+        a connection that stayed up for EVENTS_STABLE_AFTER resets the backoff and resyncs.
+        """
+        backoff = EVENTS_RECONNECT_MIN
+        while True:
+            stable = False
+
+            @callback
+            def mark_stable(_now: datetime) -> None:
+                nonlocal stable
+                stable = True
+                self.coordinator.async_set_events_connected(True)
+
+            unsub_stable = None
+            try:
+                async with self.hub.connect_events() as ws:
+                    ping_timeout = await self._async_handshake(ws)
+                    _LOGGER.debug("Connected to the Immich event stream")
+                    unsub_stable = async_call_later(self.hass, EVENTS_STABLE_AFTER, mark_stable)
+                    await self._async_listen(ws, ping_timeout)
+            except (aiohttp.ClientError, asyncio.TimeoutError, CannotConnect, ValueError) as exception:
+                _LOGGER.debug("Immich event stream unavailable: %s", exception)
+            finally:
+                if unsub_stable is not None:
+                    unsub_stable()
+                self.coordinator.async_set_events_connected(False)
+
+            if stable:
+                backoff = EVENTS_RECONNECT_MIN
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, EVENTS_RECONNECT_MAX)
+
+    async def _async_handshake(self, ws: aiohttp.ClientWebSocketResponse) -> float:
+        """Open the socket.io session, returning how long the server may stay silent."""
+        packet = await self._async_receive_text(ws)
+        if not packet.startswith(_EIO_OPEN):
+            raise ValueError(f"Unexpected handshake packet: {packet[:32]}")
+        session = json.loads(packet[len(_EIO_OPEN):])
+
+        await ws.send_str(_SIO_CONNECT)
+        packet = await self._async_receive_text(ws)
+        if not packet.startswith(_SIO_CONNECT):
+            raise ValueError(f"Connection refused: {packet[:64]}")
+
+        # The server pings every interval and gives up after the timeout, both in milliseconds
+        return (session.get("pingInterval", 25000) + session.get("pingTimeout", 20000)) / 1000
+
+    async def _async_receive_text(self, ws: aiohttp.ClientWebSocketResponse) -> str:
+        """Receive a handshake packet, raising ValueError if the server closes the connection instead."""
+        message = await ws.receive(timeout=EVENTS_RECONNECT_MAX)
+        if message.type != aiohttp.WSMsgType.TEXT:
+            raise ValueError(f"Connection closed during the handshake: {message.type.name}")
+        return message.data
+
+    async def _async_listen(self, ws: aiohttp.ClientWebSocketResponse, ping_timeout: float) -> None:
+        """Answer pings and dispatch events until the connection drops."""
+        while True:
+            message = await ws.receive(timeout=ping_timeout)
+            if message.type != aiohttp.WSMsgType.TEXT:
+                return
+
+            packet: str = message.data
+            if packet == _EIO_PING:
+                await ws.send_str(_EIO_PONG)
+            elif packet.startswith(_SIO_EVENT):
+                # Skip the acknowledgement ID, if any
+                name, *args = json.loads(packet[len(_SIO_EVENT):].lstrip("0123456789"))
+                self._handle_event(name, args[0] if args else None)
+            elif packet.startswith((_SIO_DISCONNECT, _SIO_CONNECT_ERROR)):
+                return
+
+    @callback
+    def _handle_event(self, name: str, payload: Any) -> None:
+        """Apply an event to the asset lists, skipping events with an unexpected payload."""
+        _LOGGER.debug("Immich event: %s", name)
+        try:
+            if name in ("on_asset_delete", "on_asset_hidden"):
+                self.coordinator.async_remove_assets([payload])
+            elif name == "on_asset_trash":
+                self.coordinator.async_remove_assets(payload)
+            elif name == "on_asset_update":
+                self.coordinator.async_update_asset(payload)
+            elif name in ("on_upload_success", "on_asset_restore"):
+                # Events don't say which albums an asset is in, so let the sources catch up
+                self.coordinator.async_request_sync()
+        except (KeyError, TypeError, ValueError) as exception:
+            _LOGGER.warning("Skipping Immich event %s with an unexpected payload: %s", name, exception)
@@ -1,13 +1,18 @@
 """Hub for Immich integration."""
 from __future__ import annotations
 
+import asyncio
+from collections import Counter
+from collections.abc import AsyncIterator, Callable, Mapping
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from functools import partial
 import logging
+import time
+from typing import Any
 from urllib.parse import urljoin
 
-import aiohttp
 import aiofiles
-import os
-import shutil
+import aiohttp
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.exceptions import HomeAssistantError
@@ -15,12 +20,33 @@ from homeassistant.core import HomeAssistant
 
 from .const import (
     CONF_CACHE_MODE, DEFAULT_CACHE_MODE,
-    CONF_PICTURE_TYPE, DEFAULT_PICTURE_TYPE
+    CONF_PICTURE_TYPE, DEFAULT_PICTURE_TYPE, PREVIEW_LONG_EDGE,
+    CONF_CROP_MODE, DEFAULT_CROP_MODE,
+    CONF_OUTPUT_WIDTH, DEFAULT_OUTPUT_WIDTH,
+    CONF_OUTPUT_HEIGHT, DEFAULT_OUTPUT_HEIGHT,
+    CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT,
+    CONNECT_TIMEOUT, CONNECTION_LIMIT, CONNECTION_LIMIT_PER_HOST,
+    DNS_CACHE_TTL, KEEPALIVE_TIMEOUT,
+    CONF_MAX_CONCURRENT_DOWNLOADS, DEFAULT_MAX_CONCURRENT_DOWNLOADS, DOWNLOAD_CHUNK_SIZE,
+    CONF_CACHE_MAX_SIZE, DEFAULT_CACHE_MAX_SIZE,
+    CACHE_WARM_THROTTLE, BULK_ARCHIVE_SIZE, ARCHIVE_READ_TIMEOUT,
+    CONF_BULK_CACHE_WARM, DEFAULT_BULK_CACHE_WARM,
+    CONF_PAGE_SIZE, DEFAULT_PAGE_SIZE
 )
+from .asset_index import AssetIndex, AssetInfo
+from .cache import AssetCache, asset_cache_key, async_get_asset_cache
+from .json_stream import async_load_json_stream
 
 _HEADER_API_KEY = "x-api-key"
 _LOGGER = logging.getLogger(__name__)
 
+# Asset fields the integration reads, everything else is dropped while parsing listings
+_ASSET_FIELDS = (
+    "id", "type", "updatedAt", "checksum", "thumbhash", "width", "height",
+    "isFavorite", "isTrashed", "originalFileName", "originalMimeType"
+)
+_EXIF_FIELDS = ("exifImageWidth", "exifImageHeight", "orientation", "fileSizeInByte")
+
 _ALLOWED_MIME_TYPES = ["image/png", "image/jpeg"]
 
 
@@ -33,216 +59,532 @@ class ImmichHub:
         self.api_key = api_key
         self.hass = hass
         self.config_entry = config_entry
+        self._session: aiohttp.ClientSession | None = None
+        # Caps the downloads all entities of this hub can have in flight at once
+        self._download_semaphore = asyncio.Semaphore(
+            self.options.get(CONF_MAX_CONCURRENT_DOWNLOADS, DEFAULT_MAX_CONCURRENT_DOWNLOADS)
+        )
+        self.asset_cache: AssetCache | None = None
+        if hass is not None and config_entry is not None and self.options.get(CONF_CACHE_MODE, DEFAULT_CACHE_MODE):
+            self.asset_cache = async_get_asset_cache(
+                hass, config_entry.entry_id, self.options.get(CONF_CACHE_MAX_SIZE, DEFAULT_CACHE_MAX_SIZE) * 1024 * 1024
+            )
+        self.auto_bytes_saved = 0
+
+    @property
+    def options(self) -> Mapping[str, Any]:
+        """Return the config entry options, if there is an entry yet."""
+        return self.config_entry.options if self.config_entry else {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled client session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=CONNECTION_LIMIT,
+                limit_per_host=CONNECTION_LIMIT_PER_HOST,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=self.options.get(CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT),
+                connect=CONNECT_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    async def async_close(self) -> None:
+        """Close the pooled client session and give up the cache budget of the entry."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self.asset_cache is not None and self.config_entry is not None:
+            self.asset_cache.async_remove_budget(self.config_entry.entry_id)
 
     async def authenticate(self) -> bool:
         """Test if we can authenticate with the host."""
         try:
-            async with aiohttp.ClientSession() as session:
-                url = urljoin(self.host, "/api/auth/validateToken")
-                headers = {"Accept": "application/json", _HEADER_API_KEY: self.api_key}
+            session = self._get_session()
+            url = urljoin(self.host, "/api/auth/validateToken")
+            headers = {"Accept": "application/json", _HEADER_API_KEY: self.api_key}
 
-                async with session.post(url=url, headers=headers) as response:
-                    if response.status != 200:
-                        raw_result = await response.text()
-                        _LOGGER.error("Error from API: body=%s", raw_result)
-                        return False
+            async with session.post(url=url, headers=headers) as response:
+                if response.status != 200:
+                    raw_result = await response.text()
+                    _LOGGER.error("Error from API: body=%s", raw_result)
+                    return False
 
-                    auth_result = await response.json()
+                auth_result = await response.json()
 
-                    if not auth_result.get("authStatus"):
-                        raw_result = await response.text()
-                        _LOGGER.error("Error from API: body=%s", raw_result)
-                        return False
+                if not auth_result.get("authStatus"):
+                    raw_result = await response.text()
+                    _LOGGER.error("Error from API: body=%s", raw_result)
+                    return False
 
-                    return True
-        except aiohttp.ClientError as exception:
+                return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
             _LOGGER.error("Error connecting to the API: %s", exception)
             raise CannotConnect from exception
 
     async def get_my_user_info(self) -> dict:
         """Get user info."""
         try:
-            async with aiohttp.ClientSession() as session:
-                url = urljoin(self.host, "/api/users/me")
-                headers = {"Accept": "application/json", _HEADER_API_KEY: self.api_key}
+            session = self._get_session()
+            url = urljoin(self.host, "/api/users/me")
+            headers = {"Accept": "application/json", _HEADER_API_KEY: self.api_key}
 
-                async with session.get(url=url, headers=headers) as response:
-                    if response.status != 200:
-                        raw_result = await response.text()
-                        _LOGGER.error("Error from API: body=%s", raw_result)
-                        raise ApiError()
+            async with session.get(url=url, headers=headers) as response:
+                if response.status != 200:
+                    raw_result = await response.text()
+                    _LOGGER.error("Error from API: body=%s", raw_result)
+                    raise ApiError()
 
-                    user_info: dict = await response.json()
+                user_info: dict = await response.json()
 
-                    return user_info
-        except aiohttp.ClientError as exception:
+                return user_info
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
             _LOGGER.error("Error connecting to the API: %s", exception)
             raise CannotConnect from exception
 
     async def get_asset_info(self, asset_id: str) -> dict | None:
         """Get asset info."""
         try:
-            async with aiohttp.ClientSession() as session:
-                url = urljoin(self.host, f"/api/assets/{asset_id}")
-                headers = {"Accept": "application/json", _HEADER_API_KEY: self.api_key}
+            session = self._get_session()
+            url = urljoin(self.host, f"/api/assets/{asset_id}")
+            headers = {"Accept": "application/json", _HEADER_API_KEY: self.api_key}
 
-                async with session.get(url=url, headers=headers) as response:
-                    if response.status != 200:
-                        raw_result = await response.text()
-                        _LOGGER.error("Error from API: body=%s", raw_result)
-                        raise ApiError()
+            async with session.get(url=url, headers=headers) as response:
+                if response.status != 200:
+                    raw_result = await response.text()
+                    _LOGGER.error("Error from API: body=%s", raw_result)
+                    raise ApiError()
 
-                    asset_info: dict = await response.json()
+                asset_info: dict = await response.json()
 
-                    return asset_info
-        except aiohttp.ClientError as exception:
+                return asset_info
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
             _LOGGER.error("Error connecting to the API: %s", exception)
             raise CannotConnect from exception
 
-    async def download_asset(self, asset_id: str) -> bytes | None:
-        """Download the asset."""
-
-        asset_bytes = await self.load_cached_asset(asset_id)
-        if asset_bytes:
-            return asset_bytes
-        
-        picture_type = self.config_entry.options.get(CONF_PICTURE_TYPE, DEFAULT_PICTURE_TYPE)
-
+    def _asset_cache_key(self, asset: AssetInfo, picture_type: str) -> str:
+        """Return the cache key of an asset in the given picture type."""
+        return asset_cache_key(self.host, asset.asset_id, picture_type, asset.version)
+
+    def _picture_type(self, asset: AssetInfo) -> str:
+        """Return the picture type to download an asset in, resolving auto."""
+        picture_type = self.options.get(CONF_PICTURE_TYPE, DEFAULT_PICTURE_TYPE)
+        if picture_type != "auto":
+            return picture_type
+
+        if (dimensions := asset.dimensions) is None:
+            return "preview"
+
+        width, height = dimensions
+        scale = PREVIEW_LONG_EDGE / max(width, height)
+        if scale >= 1:
+            # The preview is as large as the original
+            return "preview"
+        preview_width, preview_height = width * scale, height * scale
+
+        crop_mode = self.options.get(CONF_CROP_MODE, DEFAULT_CROP_MODE)
+        box_width = self.options.get(CONF_OUTPUT_WIDTH, DEFAULT_OUTPUT_WIDTH)
+        box_height = self.options.get(CONF_OUTPUT_HEIGHT, DEFAULT_OUTPUT_HEIGHT)
+        if crop_mode == "Combine images" and height > width:
+            box_width //= 2
+
+        if crop_mode == "Crop single image":
+            # Cropping fills the box, so the preview must cover it in both directions
+            upscaled = preview_width < box_width or preview_height < box_height
+        else:
+            upscaled = preview_width < box_width and preview_height < box_height
+
+        return "fullsize" if upscaled else "preview"
+
+    async def download_asset(self, asset: AssetInfo, pin: bool = False) -> bytes | str | None:
+        """Download the asset, returning the path of the cache file when caching is enabled.
+
+        With pin, a returned cache file is kept from eviction until release_asset is called with it.
+        """
+
+        picture_type = self._picture_type(asset)
+
+        if self.asset_cache is not None:
+            key = self._asset_cache_key(asset, picture_type)
+            return await self.asset_cache.async_get_or_fetch_path(
+                key, partial(self._fetch_asset_to_file, asset, picture_type), pin
+            )
+        return await self._fetch_asset(asset, picture_type)
+
+    def release_asset(self, asset_source: bytes | str) -> None:
+        """Release a cache file returned by download_asset with pin."""
+        if isinstance(asset_source, str) and self.asset_cache is not None:
+            self.asset_cache.release_path(asset_source)
+
+    def _count_auto_bytes_saved(self, asset: AssetInfo, picture_type: str, size: int) -> None:
+        """Add what fetching a preview saved over the original, when auto picked it."""
+        if picture_type == "preview" and self.options.get(CONF_PICTURE_TYPE) == "auto":
+            # Estimated from the original file, which is what fullsize serves for most photos
+            self.auto_bytes_saved += max(0, asset.file_size - size)
+
+    async def _fetch_asset(self, asset: AssetInfo, picture_type: str) -> bytes | None:
+        """Fetch the asset from Immich."""
+        async with self._asset_response(asset.asset_id, picture_type) as response:
+            if response is None:
+                return None
+            data = await response.read()
+        self._count_auto_bytes_saved(asset, picture_type, len(data))
+        return data
+
+    async def _fetch_asset_to_file(self, asset: AssetInfo, picture_type: str, filename: str) -> bool:
+        """Stream the asset from Immich into a file, without holding it in memory."""
+        size = 0
+        async with self._asset_response(asset.asset_id, picture_type) as response:
+            if response is None:
+                return False
+            async with aiofiles.open(filename, "wb") as f:
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
+                    size += len(chunk)
+        self._count_auto_bytes_saved(asset, picture_type, size)
+        return True
+
+    @asynccontextmanager
+    async def _asset_response(
+        self, asset_id: str, picture_type: str
+    ) -> AsyncIterator[aiohttp.ClientResponse | None]:
+        """Request the asset from Immich, yielding the response if it holds a supported image."""
         try:
-            async with aiohttp.ClientSession() as session:
-                _LOGGER.info("Downloading uncached asset from Immich: %s", asset_id)
-                url = urljoin(self.host, f"/api/assets/{asset_id}/thumbnail?size={picture_type}")    
-                headers = {_HEADER_API_KEY: self.api_key}
+            session = self._get_session()
+            url = urljoin(self.host, f"/api/assets/{asset_id}/thumbnail?size={picture_type}")    
+            headers = {_HEADER_API_KEY: self.api_key}
 
+            async with self._download_semaphore:
+                _LOGGER.info("Downloading uncached asset from Immich: %s", asset_id)
                 async with session.get(url=url, headers=headers) as response:
                     if response.status != 200:
                         _LOGGER.error("Error from API: status=%d", response.status)
-                        return None
-
-                    if response.content_type not in _ALLOWED_MIME_TYPES:
+                        yield None
+                    elif response.content_type not in _ALLOWED_MIME_TYPES:
                         _LOGGER.error(
                             "MIME type is not supported: %s", response.content_type
                         )
-                        return None
-
-                    return await response.read()
-        except aiohttp.ClientError as exception:
+                        yield None
+                    else:
+                        yield response
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
             _LOGGER.error("Error connecting to the API: %s", exception)
             raise CannotConnect from exception
 
-    async def load_cached_asset(self, asset_id) -> bytes | None:
-        filename = os.path.join(self.asset_cache_path, f"{asset_id}")
-        if os.path.isfile(filename):
-            try:
-                async with aiofiles.open(filename, "rb") as f:
-                    _LOGGER.info("Serving asset from cache: %s", asset_id)
-                    return await f.read()
-            except Exception as e:
-                _LOGGER.error("Unable load cached assed: %s %s", asset_id, e)
-        return None
-
-    async def cache_album_assets(self, album_assets: list[str]) -> None:
-        """Cache album assets."""
-
-        if self.cache_assets:
-            for asset_id in album_assets:
-                filename = os.path.join(self.asset_cache_path, f"{asset_id}")  # Optional: content_type prüfen
-                if not os.path.isfile(filename):
-                    asset_bytes = await self.download_asset(asset_id)
-                    if asset_bytes:
-                        try:
-                            async with aiofiles.open(filename, "wb") as f:
-                                _LOGGER.info("Caching asset: %s", asset_id)
-                                await f.write(asset_bytes)
-                        except Exception as e:
-                            _LOGGER.error("Unable to cache asset: %s %s", asset_id, e)
-
-    def initialize_asset_cache(self) -> None:
-        self.cache_assets = self.config_entry.options.get(CONF_CACHE_MODE, DEFAULT_CACHE_MODE)
-        self.asset_cache_path = self.hass.config.path('immich_cache')
-        
-        if os.path.isdir(self.asset_cache_path):
-            try:
-                shutil.rmtree(self.asset_cache_path)
-                _LOGGER.info("Cleared asset cache")
-            except Exception as e:
-                _LOGGER.error("Unable to clear asset cache directory: %s", e)
+    async def cache_album_assets(
+        self, album_assets: AssetIndex, progress_callback: Callable[[int, int, float], None] | None = None
+    ) -> None:
+        """Cache album assets, reporting progress and throughput in bytes per second.
+
+        Already cached assets are skipped, so an interrupted run resumes where it stopped.
+        Unless bulk warming is enabled, downloads are throttled so slideshow downloads keep priority.
+        Warming stops once the album fills the cache budget, rather than evicting its own assets.
+        """
+
+        if self.asset_cache is None:
+            return
+
+        await self.asset_cache.async_load()
+
+        total = len(album_assets)
+
+        def find_missing() -> tuple[list[AssetInfo], int]:
+            missing = []
+            cached_bytes = 0
+            for asset in map(album_assets.info, range(total)):
+                if size := self.asset_cache.file_size(self._asset_cache_key(asset, self._picture_type(asset))):
+                    cached_bytes += size
+                else:
+                    missing.append(asset)
+            return missing, cached_bytes
+
+        # Going through every asset of a large album takes a while
+        missing, cached_bytes = await self.hass.async_add_executor_job(find_missing)
+        cached = total - len(missing)
+        downloaded_bytes = 0
+        started = time.monotonic()
+
+        def report(asset_count: int, size: int) -> None:
+            nonlocal cached, downloaded_bytes
+            cached += asset_count
+            downloaded_bytes += size
+            if progress_callback is not None and total:
+                progress_callback(cached, total, downloaded_bytes / max(time.monotonic() - started, 0.001))
+            if cached_bytes + downloaded_bytes >= self.asset_cache.max_bytes and cached < total:
+                raise CacheFull
 
-        if self.cache_assets:
+        try:
+            report(0, 0)
+            if self.options.get(CONF_BULK_CACHE_WARM, DEFAULT_BULK_CACHE_WARM):
+                await self._warm_bulk(missing, report)
+            else:
+                for asset in missing:
+                    await self._warm_asset(asset, report)
+                    await asyncio.sleep(CACHE_WARM_THROTTLE)
+        except CannotConnect:
+            _LOGGER.warning("Stopped warming the asset cache, will resume on the next refresh")
+            return
+        except CacheFull:
+            _LOGGER.info(
+                "Stopped warming the asset cache, %d of %d assets fill its budget of %d bytes",
+                cached, total, self.asset_cache.max_bytes,
+            )
+            return
+
+        if missing:
+            _LOGGER.info(
+                "Warmed the asset cache with %d assets, %d bytes in %.1f s",
+                len(missing), downloaded_bytes, time.monotonic() - started,
+            )
+
+    async def _warm_asset(self, asset: AssetInfo, report: Callable[[int, int], None]) -> None:
+        """Download one asset into the cache."""
+        await self.download_asset(asset)
+        report(1, self.asset_cache.file_size(self._asset_cache_key(asset, self._picture_type(asset))))
+
+    async def _warm_bulk(self, assets: list[AssetInfo], report: Callable[[int, int], None]) -> None:
+        """Download assets into the cache in archive batches, and the rest concurrently."""
+        # Archives hold originals, which is what fullsize serves for JPEG and PNG photos
+        archivable = {
+            asset.asset_id: asset for asset in assets
+            if self._picture_type(asset) == "fullsize"
+            and asset.original_file_name
+            and asset.original_mime_type in _ALLOWED_MIME_TYPES
+        }
+        remaining = [asset for asset in assets if asset.asset_id not in archivable]
+
+        if archivable:
             try:
-                os.makedirs(self.asset_cache_path, exist_ok=True)
-                _LOGGER.info("Created asset cache directory: ", self.asset_cache_path)
-            except Exception as e:
-                _LOGGER.error("Unable to create asset cache directory: %s %s", self.asset_cache_path, e)
-
-    async def list_favorite_images(self) -> list[dict]:
-        """List all favorite images."""
+                archives = await self._get_download_archives(list(archivable))
+            except ApiError:
+                _LOGGER.info("Archive downloads are not available, warming the asset cache asset by asset")
+                archives = []
+                remaining = assets
+
+            for archive_asset_ids in archives:
+                # Archives also list the motion parts of live photos, which aren't in the index
+                archive_assets = [archivable[asset_id] for asset_id in archive_asset_ids if asset_id in archivable]
+                if archive_assets:
+                    remaining.extend(await self._warm_archive(archive_assets, report))
+
+        # Fall back to one request per asset, as many at once as the download limit allows
+        pending = iter(remaining)
+
+        async def worker() -> None:
+            for asset in pending:
+                await self._warm_asset(asset, report)
+
+        await asyncio.gather(
+            *(worker() for _ in range(self.options.get(CONF_MAX_CONCURRENT_DOWNLOADS, DEFAULT_MAX_CONCURRENT_DOWNLOADS)))
+        )
+
+    async def _warm_archive(self, assets: list[AssetInfo], report: Callable[[int, int], None]) -> list[AssetInfo]:
+        """Download one archive into the cache, returning the assets it did not provide."""
+        # Immich names archive members after the original file name, renaming duplicates
+        name_counts = Counter(asset.original_file_name for asset in assets)
+        keys_by_member = {
+            asset.original_file_name: self._asset_cache_key(asset, "fullsize")
+            for asset in assets
+            if name_counts[asset.original_file_name] == 1
+        }
+
+        stored = await self.asset_cache.async_put_archive(
+            partial(self._fetch_archive_to_file, [asset.asset_id for asset in assets]), keys_by_member
+        )
+        report(len(stored), sum(stored.values()))
+
+        return [asset for asset in assets if self._asset_cache_key(asset, "fullsize") not in stored]
+
+    async def _get_download_archives(self, asset_ids: list[str]) -> list[list[str]]:
+        """Split assets into the archives Immich would serve them in."""
         try:
-            async with aiohttp.ClientSession() as session:
-                url = urljoin(self.host, "/api/search/metadata")
-                headers = {"Accept": "application/json", _HEADER_API_KEY: self.api_key}
-                data = {"isFavorite": "true"}
+            session = self._get_session()
+            url = urljoin(self.host, "/api/download/info")
+            headers = {"Accept": "application/json", _HEADER_API_KEY: self.api_key}
+            data = {"assetIds": asset_ids, "archiveSize": BULK_ARCHIVE_SIZE}
+
+            async with session.post(url=url, headers=headers, json=data) as response:
+                if response.status != 200:
+                    raw_result = await response.text()
+                    _LOGGER.error("Error from API: body=%s", raw_result)
+                    raise ApiError()
+
+                download_info = await response.json()
+                return [archive["assetIds"] for archive in download_info["archives"]]
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
+            _LOGGER.error("Error connecting to the API: %s", exception)
+            raise CannotConnect from exception
 
-                async with session.post(url=url, headers=headers, data=data) as response:
+    async def _fetch_archive_to_file(self, asset_ids: list[str], filename: str) -> bool:
+        """Stream a zip archive of the original assets from Immich into a file."""
+        try:
+            session = self._get_session()
+            url = urljoin(self.host, "/api/download/archive")
+            headers = {_HEADER_API_KEY: self.api_key}
+
+            async with self._download_semaphore:
+                _LOGGER.info("Downloading archive of %d assets from Immich", len(asset_ids))
+                timeout = aiohttp.ClientTimeout(total=None, connect=CONNECT_TIMEOUT, sock_read=ARCHIVE_READ_TIMEOUT)
+                async with session.post(
+                    url=url, headers=headers, json={"assetIds": asset_ids}, timeout=timeout
+                ) as response:
                     if response.status != 200:
-                        raw_result = await response.text()
-                        _LOGGER.error("Error from API: body=%s", raw_result)
-                        raise ApiError()
-
-                    favorites = await response.json()
-                    assets: list[dict] = favorites["assets"]["items"]
-
-                    filtered_assets: list[dict] = [
-                        asset for asset in assets if asset["type"] == "IMAGE"
-                    ]
+                        _LOGGER.error("Error from API: status=%d", response.status)
+                        return False
 
-                    return filtered_assets
-        except aiohttp.ClientError as exception:
+                    async with aiofiles.open(filename, "wb") as f:
+                        async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                            await f.write(chunk)
+                    return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
             _LOGGER.error("Error connecting to the API: %s", exception)
             raise CannotConnect from exception
 
+    def connect_events(self) -> AbstractAsyncContextManager[aiohttp.ClientWebSocketResponse]:
+        """Open the Immich real-time event socket, a socket.io connection over a websocket."""
+        session = self._get_session()
+        url = urljoin(self.host, "/api/socket.io/?EIO=4&transport=websocket")
+        return session.ws_connect(url, headers={_HEADER_API_KEY: self.api_key})
+
     async def list_all_albums(self) -> list[dict]:
         """List all albums."""
         try:
-            async with aiohttp.ClientSession() as session:
-                url = urljoin(self.host, "/api/albums")
-                headers = {"Accept": "application/json", _HEADER_API_KEY: self.api_key}
+            session = self._get_session()
+            url = urljoin(self.host, "/api/albums")
+            headers = {"Accept": "application/json", _HEADER_API_KEY: self.api_key}
 
-                async with session.get(url=url, headers=headers) as response:
-                    if response.status != 200:
-                        raw_result = await response.text()
-                        _LOGGER.error("Error from API: body=%s", raw_result)
-                        raise ApiError()
+            async with session.get(url=url, headers=headers) as response:
+                if response.status != 200:
+                    raw_result = await response.text()
+                    _LOGGER.error("Error from API: body=%s", raw_result)
+                    raise ApiError()
 
-                    album_list: list[dict] = await response.json()
+                album_list: list[dict] = await response.json()
 
-                    return album_list
-        except aiohttp.ClientError as exception:
+                return album_list
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
             _LOGGER.error("Error connecting to the API: %s", exception)
             raise CannotConnect from exception
 
+    async def get_album_info(self, album_id: str, with_assets: bool = True) -> dict:
+        """Get album info, optionally without its (potentially huge) asset list."""
+        try:
+            session = self._get_session()
+            url = urljoin(self.host, f"/api/albums/{album_id}")
+            headers = {"Accept": "application/json", _HEADER_API_KEY: self.api_key}
+            params = {} if with_assets else {"withoutAssets": "true"}
+
+            async with session.get(url=url, headers=headers, params=params) as response:
+                if response.status != 200:
+                    raw_result = await response.text()
+                    _LOGGER.error("Error from API: body=%s", raw_result)
+                    raise ApiError()
+
+                album_info: dict = await self._load_listing(response, ("assets",))
+
+                return album_info
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
+            _LOGGER.error("Error connecting to the API: %s", exception)
+            raise CannotConnect from exception
+
+    @staticmethod
+    async def _load_listing(response: aiohttp.ClientResponse, array_path: tuple[str, ...]) -> dict:
+        """Parse a listing response as it streams in, keeping only the asset fields in use."""
+        try:
+            return await async_load_json_stream(response.content, array_path, _trim_asset)
+        except ValueError as exception:
+            _LOGGER.error("Invalid response from API: %s", exception)
+            raise ApiError() from exception
+
     async def list_album_images(self, album_id: str) -> list[dict]:
         """List all images in an album."""
+        album_info = await self.get_album_info(album_id)
+        assets: list[dict] = album_info["assets"]
+
+        filtered_assets: list[dict] = [
+            asset for asset in assets if asset["type"] == "IMAGE"
+        ]
+
+        return filtered_assets
+
+    async def list_favorite_images(self) -> list[dict]:
+        """List all favorite images."""
+        return [asset async for page in self.iter_favorite_image_pages() for asset in page]
+
+    async def iter_favorite_image_pages(self) -> AsyncIterator[list[dict]]:
+        """Yield favorite images page by page."""
+        async for page in self.iter_search_pages({"isFavorite": True, "type": "IMAGE", "withExif": True}):
+            yield [asset for asset in page if asset["type"] == "IMAGE"]
+
+    async def search_assets(self, query: dict[str, Any]) -> list[dict]:
+        """Search asset metadata, following every result page."""
+        return [asset async for page in self.iter_search_pages(query) for asset in page]
+
+    async def iter_search_pages(self, query: dict[str, Any]) -> AsyncIterator[list[dict]]:
+        """Yield asset metadata search results page by page.
+
+        The next page is requested while the caller processes the current one.
+        """
+        page_size = self.options.get(CONF_PAGE_SIZE, DEFAULT_PAGE_SIZE)
+        next_page: asyncio.Task[tuple[list[dict], str | None]] | None = asyncio.create_task(
+            self._search_page(query, 1, page_size)
+        )
         try:
-            async with aiohttp.ClientSession() as session:
-                url = urljoin(self.host, f"/api/albums/{album_id}")
-                headers = {"Accept": "application/json", _HEADER_API_KEY: self.api_key}
+            while next_page is not None:
+                assets, next_page_number = await next_page
+                next_page = (
+                    asyncio.create_task(self._search_page(query, int(next_page_number), page_size))
+                    if next_page_number
+                    else None
+                )
+                yield assets
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    async def _search_page(self, query: dict[str, Any], page: int, page_size: int) -> tuple[list[dict], str | None]:
+        """Fetch one page of asset metadata search results and the number of the next page."""
+        try:
+            session = self._get_session()
+            url = urljoin(self.host, "/api/search/metadata")
+            headers = {"Accept": "application/json", _HEADER_API_KEY: self.api_key}
+            data = {**query, "page": page, "size": page_size}
+
+            async with session.post(url=url, headers=headers, json=data) as response:
+                if response.status != 200:
+                    raw_result = await response.text()
+                    _LOGGER.error("Error from API: body=%s", raw_result)
+                    raise ApiError()
+
+                result = await self._load_listing(response, ("assets", "items"))
+                assets: list[dict] = result["assets"]["items"]
+
+                return assets, result["assets"].get("nextPage")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
+            _LOGGER.error("Error connecting to the API: %s", exception)
+            raise CannotConnect from exception
 
-                async with session.get(url=url, headers=headers) as response:
-                    if response.status != 200:
-                        raw_result = await response.text()
-                        _LOGGER.error("Error from API: body=%s", raw_result)
-                        raise ApiError()
+    async def get_asset_statistics(self, is_favorite: bool | None = None) -> dict:
+        """Get the number of images and videos, optionally only favorites."""
+        try:
+            session = self._get_session()
+            url = urljoin(self.host, "/api/assets/statistics")
+            headers = {"Accept": "application/json", _HEADER_API_KEY: self.api_key}
+            params = {} if is_favorite is None else {"isFavorite": str(is_favorite).lower()}
 
-                    album_info: dict = await response.json()
-                    assets: list[dict] = album_info["assets"]
+            async with session.get(url=url, headers=headers, params=params) as response:
+                if response.status != 200:
+                    raw_result = await response.text()
+                    _LOGGER.error("Error from API: body=%s", raw_result)
+                    raise ApiError()
 
-                    filtered_assets: list[dict] = [
-                        asset for asset in assets if asset["type"] == "IMAGE"
-                    ]
+                statistics: dict = await response.json()
 
-                    return filtered_assets
-        except aiohttp.ClientError as exception:
+                return statistics
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
             _LOGGER.error("Error connecting to the API: %s", exception)
             raise CannotConnect from exception
 
@@ -257,3 +599,15 @@ class InvalidAuth(HomeAssistantError):
 
 class ApiError(HomeAssistantError):
     """Error to indicate that the API returned an error."""
+
+
+class CacheFull(HomeAssistantError):
+    """Error to indicate that the asset cache budget is used up."""
+
+
+def _trim_asset(asset: dict) -> dict:
+    """Return an asset with only the fields the integration reads."""
+    trimmed = {field: asset[field] for field in _ASSET_FIELDS if field in asset}
+    if exif_info := asset.get("exifInfo"):
+        trimmed["exifInfo"] = {field: exif_info[field] for field in _EXIF_FIELDS if field in exif_info}
+    return trimmed
@@ -1,25 +1,42 @@
+import asyncio
+from bisect import bisect_left
+from collections import deque
 from datetime import datetime, timedelta
+import hashlib
 import logging
 from typing import Any
-import random
-from io import BytesIO
+
+from PIL import Image
 
 from homeassistant.components.image import ImageEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_API_KEY, CONF_HOST
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.event import async_track_time_interval
 
 from .const import (
-    CONF_WATCHED_ALBUMS, DOMAIN, CONF_CROP_MODE, CONF_IMAGE_SELECTION_MODE,
-    CONF_UPDATE_INTERVAL, CONF_UPDATE_INTERVAL_UNIT,
+    CONF_WATCHED_ALBUMS, DOMAIN, FAVORITES_SOURCE, CONF_CROP_MODE, CONF_IMAGE_SELECTION_MODE,
+    CONF_UPDATE_INTERVAL, CONF_UPDATE_INTERVAL_UNIT, CONF_UPDATE_JITTER, DEFAULT_UPDATE_JITTER,
+    CONF_MAX_CONCURRENT_RENDERS, DEFAULT_MAX_CONCURRENT_RENDERS,
+    CONF_DEMAND_MODE, DEFAULT_DEMAND_MODE, CONF_DEMAND_IDLE_TIMEOUT, DEFAULT_DEMAND_IDLE_TIMEOUT,
     DEFAULT_CROP_MODE, DEFAULT_IMAGE_SELECTION_MODE,
     DEFAULT_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL_UNIT,
-    CONF_CACHE_MODE, DEFAULT_CACHE_MODE
+    CONF_CACHE_MODE, DEFAULT_CACHE_MODE, CONF_PICTURE_TYPE,
+    CONF_PREFETCH_SLIDES, DEFAULT_PREFETCH_SLIDES,
+    CONF_PREFETCH_BUDGET, DEFAULT_PREFETCH_BUDGET,
+    CONF_RENDER_PROFILE, DEFAULT_RENDER_PROFILE,
+    CONF_OUTPUT_WIDTH, DEFAULT_OUTPUT_WIDTH,
+    CONF_OUTPUT_HEIGHT, DEFAULT_OUTPUT_HEIGHT,
+    CONF_OUTPUT_FORMAT, DEFAULT_OUTPUT_FORMAT, OUTPUT_CONTENT_TYPES,
+    RENDITION_WIDTHS
 )
-from .hub import ImmichHub
-from .coordinator import process_images_for_slideshow
+from .asset_index import AssetIndex, AssetInfo
+from .coordinator import render_rendition, render_slideshow_image
+from .models import ImmichData
+from .renderer import RenderQueueFull
+from .scheduler import RefreshScheduler
+from .shuffle import ShuffleBag
+from .views import async_register_rendition_entity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -29,9 +46,7 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up Immich image platform."""
-    hub = ImmichHub(
-        host=config_entry.data[CONF_HOST], hass=hass, config_entry=config_entry, api_key=config_entry.data[CONF_API_KEY]
-    )
+    data: ImmichData = hass.data[DOMAIN][config_entry.entry_id]
 
     update_interval = config_entry.options.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)
     update_interval_unit = config_entry.options.get(CONF_UPDATE_INTERVAL_UNIT, DEFAULT_UPDATE_INTERVAL_UNIT)
@@ -42,15 +57,23 @@ async def async_setup_entry(
     update_interval = timedelta(seconds=update_interval)
     _LOGGER.debug(f"Update interval set to {update_interval}")
 
-    async_add_entities([ImmichImageFavorite(hass, hub, config_entry, update_interval)])
+    # One scheduler staggers the refreshes of all entities of the entry
+    scheduler = RefreshScheduler(
+        hass,
+        update_interval,
+        config_entry.options.get(CONF_MAX_CONCURRENT_RENDERS, DEFAULT_MAX_CONCURRENT_RENDERS),
+        config_entry.options.get(CONF_UPDATE_JITTER, DEFAULT_UPDATE_JITTER) / 100,
+    )
+
+    async_add_entities([ImmichImageFavorite(hass, data, config_entry, scheduler)])
 
     watched_albums = config_entry.options.get(CONF_WATCHED_ALBUMS, [])
     async_add_entities(
         [
             ImmichImageAlbum(
-                hass, hub, config_entry, album_id=album["id"], album_name=album["albumName"], update_interval=update_interval
+                hass, data, config_entry, album_id=album["id"], album_name=album["albumName"], scheduler=scheduler
             )
-            for album in await hub.list_all_albums()
+            for album in await data.hub.list_all_albums()
             if album["id"] in watched_albums
         ]
     )
@@ -61,154 +84,423 @@ class BaseImmichImage(ImageEntity):
     _attr_has_entity_name = True
     _attr_should_poll = False
 
-    def __init__(self, hass: HomeAssistant, hub: ImmichHub, config_entry: ConfigEntry, update_interval: timedelta) -> None:
+    _source: str
+
+    def __init__(self, hass: HomeAssistant, data: ImmichData, config_entry: ConfigEntry, scheduler: RefreshScheduler) -> None:
         """Initialize the Immich image entity."""
         super().__init__(hass=hass, verify_ssl=True)
-        self.hub = hub
+        self.hub = data.hub
+        self.renderer = data.renderer
+        self.coordinator = data.coordinator
         self.hass = hass
         self.config_entry = config_entry
-        self.update_interval = update_interval
+        self.scheduler = scheduler
+        # Demand mode: skip updates while no client fetches the image, catch up on the next fetch
+        self._demand_mode: bool = config_entry.options.get(CONF_DEMAND_MODE, DEFAULT_DEMAND_MODE)
+        # A viewer fetches once per update, so it only looks idle after missing two of them
+        self._idle_timeout: float = max(
+            config_entry.options.get(CONF_DEMAND_IDLE_TIMEOUT, DEFAULT_DEMAND_IDLE_TIMEOUT) * 60,
+            2 * scheduler.interval,
+        )
+        self._last_fetched: float | None = None
+        self._updates_skipped = False
         self._current_image_bytes: bytes | None = None
-        self._cached_available_asset_ids: list[str] | None = None
-        self._available_asset_ids_last_updated: datetime | None = None
+        self._held_portrait_image: Image.Image | None = None
+        # Portraits shown early as the partner of a sequential pick
+        self._paired_asset_ids: set[str] = set()
+        # Asset index of the last pick, which positions in the slideshow state refer to
+        self._asset_index: AssetIndex | None = None
+        # Random order without repeats, and the one portrait partners are drawn from
+        self._shuffle_bag = ShuffleBag()
+        self._portrait_bag = ShuffleBag()
+        # Set while the bags follow a new asset index in the executor
+        self._syncing_bags = False
         self._attr_extra_state_attributes = {}
-        self._unsub_interval = None
+        self._render_lock = asyncio.Lock()
+        # Ring buffer of rendered slides, bounded by a slide count and a byte budget
+        self._prefetched_slides: deque[bytes] = deque()
+        self._prefetched_bytes = 0
+        self._prefetch_slides: int = config_entry.options.get(CONF_PREFETCH_SLIDES, DEFAULT_PREFETCH_SLIDES)
+        self._prefetch_budget: int = config_entry.options.get(CONF_PREFETCH_BUDGET, DEFAULT_PREFETCH_BUDGET) * 1024 * 1024
+        self._prefetch_task: asyncio.Task | None = None
+        # Canvas and encoding matched to the display the slideshow is shown on
+        self._output_width: int = config_entry.options.get(CONF_OUTPUT_WIDTH, DEFAULT_OUTPUT_WIDTH)
+        self._output_height: int = config_entry.options.get(CONF_OUTPUT_HEIGHT, DEFAULT_OUTPUT_HEIGHT)
+        self._output_format: str = config_entry.options.get(CONF_OUTPUT_FORMAT, DEFAULT_OUTPUT_FORMAT)
+        self._attr_content_type = OUTPUT_CONTENT_TYPES[self._output_format]
+        # Smaller copies of the current slide, rendered on first request
+        self._slide_etag: str | None = None
+        self._renditions: dict[int, bytes] = {}
+        self._rendition_lock = asyncio.Lock()
 
     async def async_added_to_hass(self) -> None:
-        """Set up a timer to refresh the image periodically."""
+        """Schedule periodic refreshes of the image."""
         await super().async_added_to_hass()
-        _LOGGER.debug(f"Setting up image refresh timer with interval {self.update_interval}")
-        self._unsub_interval = async_track_time_interval(
-            self.hass, self.async_update_image, self.update_interval
+        self.async_on_remove(
+            self.coordinator.async_track_source(
+                self._source, self._handle_asset_list_update, self._slideshow_state
+            )
         )
-        # Trigger an immediate update
-        await self.async_update_image()        
+        self._restore_slideshow_state()
+        self.async_on_remove(async_register_rendition_entity(self.hass, self))
+        # Update now, without holding up Home Assistant startup, then in turn with the other entities
+        self.async_on_remove(self.scheduler.async_add(self.entity_id, self.async_update_image))
 
     async def async_will_remove_from_hass(self) -> None:
-        """Cancel the timer when the entity is removed."""
-        if self._unsub_interval:
-            self._unsub_interval()
+        """Cancel background work when the entity is removed."""
+        if self._prefetch_task:
+            self._prefetch_task.cancel()
         await super().async_will_remove_from_hass()
 
     async def async_update_image(self, now: datetime | None = None) -> None:
         """Update the image."""
+        if self._current_image_bytes is not None and self._is_idle():
+            _LOGGER.debug(f"No client fetched {self.entity_id} recently, skipping update")
+            self._updates_skipped = True
+            return
+
         _LOGGER.debug(f"Updating image at {datetime.now()}")
         await self._load_and_cache_next_image()
         self._attr_image_last_updated = datetime.now()
+        if self.config_entry.options.get(CONF_PICTURE_TYPE) == "auto":
+            self._attr_extra_state_attributes["auto_bytes_saved"] = self.hub.auto_bytes_saved
         self.async_write_ha_state()
         # Force Home Assistant to request the new image
         await self.async_update_ha_state()
 
     async def async_image(self) -> bytes | None:
         """Return bytes of image."""
+        if self._demand_mode:
+            self._last_fetched = self.hass.loop.time()
+            if self._updates_skipped:
+                # A client is back after updates were skipped, show it a new slide now
+                self._updates_skipped = False
+                await self._load_and_cache_next_image()
+                self.async_write_ha_state()
+
         if self._current_image_bytes is None:
             await self._load_and_cache_next_image()
         return self._current_image_bytes
 
-    async def _refresh_available_asset_ids(self) -> list[str] | None:
-        """Refresh the list of available asset IDs."""
-        raise NotImplementedError
+    def _is_idle(self) -> bool:
+        """Return whether demand mode applies and no client fetched the image within the idle timeout."""
+        return self._demand_mode and (
+            self._last_fetched is None or self.hass.loop.time() - self._last_fetched > self._idle_timeout
+        )
 
-    async def _get_next_asset_ids(self) -> list[str] | None:
-        """Get the asset ids of the next images we want to display."""
-        if (
-            self._cached_available_asset_ids is None
-            or self._available_asset_ids_last_updated is None
-            or (datetime.now() - self._available_asset_ids_last_updated) > timedelta(hours=1)
-        ):
-            self._cached_available_asset_ids = await self._refresh_available_asset_ids()
-            self._available_asset_ids_last_updated = datetime.now()
+    async def async_rendition(self, width: int) -> tuple[bytes, str] | None:
+        """Return the current slide at the smallest rendition at least as wide as asked, with its ETag."""
+        image_bytes = await self.async_image()
+        if image_bytes is None:
+            return None
 
-        if not self._cached_available_asset_ids:
+        slide_etag = self._slide_etag
+        rendition_width = next((w for w in RENDITION_WIDTHS if w >= width), None)
+        if width <= 0 or rendition_width is None or rendition_width >= self._output_width:
+            return image_bytes, slide_etag
+
+        async with self._rendition_lock:
+            rendition = self._renditions.get(rendition_width) if self._slide_etag == slide_etag else None
+            if rendition is None:
+                try:
+                    rendition = await self.renderer.async_render(
+                        render_rendition,
+                        image_bytes,
+                        rendition_width,
+                        self._output_format,
+                        self.config_entry.options.get(CONF_RENDER_PROFILE, DEFAULT_RENDER_PROFILE),
+                    )
+                except RenderQueueFull:
+                    return image_bytes, slide_etag
+                # The slide may have moved on while rendering, only keep renditions of the current one
+                if self._slide_etag == slide_etag:
+                    self._renditions[rendition_width] = rendition
+
+        return rendition, f"{slide_etag}-{rendition_width}"
+
+    @callback
+    def _slideshow_state(self) -> dict[str, Any] | None:
+        """Return what is needed to resume the slideshow after a restart."""
+        if self._asset_index is None or self._syncing_bags:
+            # Nothing shown yet, or the bags are changing, keep the state stored last
+            return self.coordinator.stored_slideshow_state(self._source)
+
+        return {
+            "asset_index": self._asset_index.digest,
+            "last_index": self._attr_extra_state_attributes.get("last_index"),
+            "paired_asset_ids": list(self._paired_asset_ids),
+            "shuffle_bag": self._shuffle_bag.as_dict(),
+            "portrait_bag": self._portrait_bag.as_dict(),
+        }
+
+    @callback
+    def _restore_slideshow_state(self) -> None:
+        """Resume the slideshow where the last run left it, if the stored asset index still applies."""
+        state = self.coordinator.stored_slideshow_state(self._source)
+        asset_index = self.coordinator.data.get(self._source)
+        if state is None or asset_index is None or state.get("asset_index") != asset_index.digest:
+            return
+
+        try:
+            if state.get("shuffle_bag"):
+                self._shuffle_bag.restore(asset_index, state["shuffle_bag"])
+            if state.get("portrait_bag"):
+                self._portrait_bag.restore(asset_index, state["portrait_bag"], asset_index.portraits)
+            last_index = state.get("last_index")
+            paired_asset_ids = set(state.get("paired_asset_ids") or ())
+        except (KeyError, TypeError, ValueError) as exception:
+            _LOGGER.debug(f"Ignoring stored slideshow state: {exception}")
+            self._shuffle_bag = ShuffleBag()
+            self._portrait_bag = ShuffleBag()
+            return
+
+        if isinstance(last_index, int):
+            self._attr_extra_state_attributes["last_index"] = last_index
+        self._paired_asset_ids = paired_asset_ids
+        self._asset_index = asset_index
+        _LOGGER.debug(f"Resumed slideshow of {self._source} from the last run")
+
+    @callback
+    def _handle_asset_list_update(self) -> None:
+        """Expose the cache warming progress and throughput of the source as state attributes."""
+        progress = self.coordinator.cache_warm_progress.get(self._source)
+        if progress is not None and progress != self._attr_extra_state_attributes.get("cache_warm_progress"):
+            self._attr_extra_state_attributes["cache_warm_progress"] = progress
+            self._attr_extra_state_attributes["cache_warm_throughput"] = self.coordinator.cache_warm_throughput.get(self._source)
+            self.async_write_ha_state()
+
+    async def _get_next_assets(self) -> list[AssetInfo] | None:
+        """Get the assets of the next images we want to display."""
+        asset_index = await self.coordinator.async_get_asset_ids(self._source)
+
+        if not asset_index:
             _LOGGER.error("No assets are available")
             return None
 
+        self._asset_index = asset_index
+        self.coordinator.async_schedule_slideshow_save()
+
         image_selection_mode = self.config_entry.options.get(CONF_IMAGE_SELECTION_MODE, DEFAULT_IMAGE_SELECTION_MODE)
         crop_mode = self.config_entry.options.get(CONF_CROP_MODE, DEFAULT_CROP_MODE)
 
-        num_images = 2 if crop_mode == "Combine images" else 1
+        if image_selection_mode == "Random":
+            await self._async_sync_shuffle_bags(asset_index, crop_mode == "Combine images")
+
+        if crop_mode == "Combine images":
+            positions = self._select_by_orientation(asset_index, image_selection_mode)
+        elif image_selection_mode == "Random":
+            positions = [self._shuffle_bag.draw()]
+        else:  # Sequential
+            positions = [self._next_sequential_position(asset_index)]
+
+        return [asset_index.info(position) for position in positions]
+
+    async def _async_sync_shuffle_bags(self, asset_index: AssetIndex, with_portraits: bool) -> None:
+        """Make the shuffle bags follow the asset index, in the executor as remapping large bags takes a while."""
+        if self._shuffle_bag.is_synced(asset_index) and (
+            not with_portraits or self._portrait_bag.is_synced(asset_index)
+        ):
+            return
+
+        def sync_bags() -> None:
+            self._shuffle_bag.sync(asset_index)
+            if with_portraits:
+                self._portrait_bag.sync(asset_index, asset_index.portraits)
+
+        self._syncing_bags = True
+        try:
+            await self.hass.async_add_executor_job(sync_bags)
+        finally:
+            self._syncing_bags = False
 
+    def _select_by_orientation(self, asset_index: AssetIndex, image_selection_mode: str) -> list[int]:
+        """Pick a portrait pair or a single landscape from metadata, so no download is wasted on pairing."""
         if image_selection_mode == "Random":
-            return random.sample(self._cached_available_asset_ids, num_images)
+            position = self._shuffle_bag.draw()
+            self._portrait_bag.mark_drawn(position)
         else:  # Sequential
-            start_index = self._attr_extra_state_attributes.get("last_index", -1) + 1
-            selected_ids = self._cached_available_asset_ids[start_index:start_index + num_images]
-            if len(selected_ids) < num_images:
-                selected_ids += self._cached_available_asset_ids[:num_images - len(selected_ids)]
-            self._attr_extra_state_attributes["last_index"] = (start_index + num_images - 1) % len(self._cached_available_asset_ids)
-            return selected_ids
+            position = self._next_sequential_position(asset_index)
+
+        is_portrait = asset_index.is_portrait(position)
+
+        if is_portrait is None:
+            # Orientation unknown, leave the pairing to the renderer as before
+            if image_selection_mode == "Random":
+                return [position, self._shuffle_bag.draw()]
+            return [position, self._next_sequential_position(asset_index)]
+
+        portraits = asset_index.portraits
+        if not is_portrait or len(portraits) < 2:
+            return [position]
+
+        if image_selection_mode == "Random":
+            partner_position = self._portrait_bag.draw()
+            if partner_position == position:
+                partner_position = self._portrait_bag.draw()
+            self._shuffle_bag.mark_drawn(partner_position)
+            return [position, partner_position]
+
+        # Sequential: pair with the next portrait, which is then skipped when its turn comes
+        partner_position = portraits[(bisect_left(portraits, position) + 1) % len(portraits)]
+        self._paired_asset_ids.add(asset_index[partner_position])
+        return [position, partner_position]
+
+    def _next_sequential_position(self, asset_index: AssetIndex) -> int:
+        """Advance the sequential cursor, skipping assets already shown as a portrait partner."""
+        for _ in range(len(asset_index)):
+            index = (self._attr_extra_state_attributes.get("last_index", -1) + 1) % len(asset_index)
+            self._attr_extra_state_attributes["last_index"] = index
+            asset_id = asset_index[index]
+            if asset_id not in self._paired_asset_ids:
+                return index
+            self._paired_asset_ids.discard(asset_id)
+        return self._attr_extra_state_attributes["last_index"]
 
     async def _load_and_cache_next_image(self) -> None:
-        """Download, process, and cache the image."""
-        asset_ids = await self._get_next_asset_ids()
-        _LOGGER.debug(f"Got asset IDs: {asset_ids}")
-        if not asset_ids:
-            _LOGGER.warning("No asset IDs available")
+        """Swap in the next slide, from the prefetch buffer when one is ready."""
+        if self._prefetched_slides:
+            image_bytes = self._prefetched_slides.popleft()
+            self._prefetched_bytes -= len(image_bytes)
+            _LOGGER.debug(f"Serving prefetched slide, {len(self._prefetched_slides)} left in buffer")
+        else:
+            try:
+                image_bytes = await self._render_next_slide()
+            except RenderQueueFull:
+                _LOGGER.warning("Render queue is full, keeping the current image")
+                image_bytes = None
+
+        if image_bytes is not None:
+            self._current_image_bytes = image_bytes
+            self._slide_etag = hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+            self._renditions = {}
+            self._attr_image_last_updated = datetime.now()
+
+        self._schedule_prefetch()
+
+    def _schedule_prefetch(self) -> None:
+        """Start refilling the prefetch buffer in the background."""
+        if self._prefetch_slides <= 0 or (self._prefetch_task and not self._prefetch_task.done()):
             return
 
-        asset_bytes_list = []
-        for asset_id in asset_ids:
-            asset_bytes = await self.hub.download_asset(asset_id)
-            if asset_bytes:
-                asset_bytes_list.append(asset_bytes)
-            else:
-                _LOGGER.warning(f"Failed to download asset with ID: {asset_id}")
+        self._prefetch_task = self.hass.async_create_background_task(
+            self._fill_prefetch_buffer(), f"immich prefetch {self.entity_id}"
+        )
 
-        if not asset_bytes_list:
-            _LOGGER.error("Failed to download any images")
-            return
+    async def _fill_prefetch_buffer(self) -> None:
+        """Render slides until the buffer holds enough slides or bytes."""
+        largest_slide = 0
+        # A render may legitimately yield nothing while a portrait is held, but don't spin forever
+        attempts = 2 * self._prefetch_slides
+
+        while (
+            attempts > 0
+            and len(self._prefetched_slides) < self._prefetch_slides
+            and self._prefetched_bytes + largest_slide <= self._prefetch_budget
+        ):
+            attempts -= 1
+            try:
+                # Leave a round of renders free for scheduled updates, which can't wait for the buffer
+                image_bytes = await self._render_next_slide(reserve=self.renderer.max_workers)
+            except (HomeAssistantError, OSError) as exception:
+                _LOGGER.debug("Unable to prefetch slide: %s", exception)
+                return
+
+            if image_bytes is None:
+                continue
+
+            self._prefetched_slides.append(image_bytes)
+            self._prefetched_bytes += len(image_bytes)
+            largest_slide = max(largest_slide, len(image_bytes))
+
+    async def _render_next_slide(self, reserve: int = 0) -> bytes | None:
+        """Download and render the next slide, raising RenderQueueFull if the renderer is busy.
+
+        Capacity is checked before picking, so a refused render doesn't skip a slide.
+        """
+        async with self._render_lock:
+            if not self.renderer.has_capacity(reserve):
+                raise RenderQueueFull()
+            return await self._download_and_render_next_slide()
+
+    async def _download_and_render_next_slide(self) -> bytes | None:
+        """Download, process, and encode the next slide."""
+        assets = await self._get_next_assets()
+        _LOGGER.debug(f"Got asset IDs: {[asset.asset_id for asset in assets or ()]}")
+        if not assets:
+            _LOGGER.warning("No asset IDs available")
+            return None
 
-        _LOGGER.debug(f"Processing {len(asset_bytes_list)} images")
-        processed_image, is_combined = process_images_for_slideshow(
-            asset_bytes_list, 
-            2048, 
-            1536, 
-            self.config_entry.options.get(CONF_CROP_MODE, DEFAULT_CROP_MODE),
-            self.config_entry.options.get(CONF_IMAGE_SELECTION_MODE, DEFAULT_IMAGE_SELECTION_MODE)
+        # Fetch all assets of the slide at once, the hub limits how many run concurrently
+        downloads = await asyncio.gather(
+            *(self.hub.download_asset(asset, pin=True) for asset in assets), return_exceptions=True
         )
-        
-        if processed_image is None:
-            _LOGGER.info("No image to display at this time (waiting for another portrait image)")
-            return
+        try:
+            for download in downloads:
+                if isinstance(download, BaseException):
+                    raise download
+            return await self._render_slide(assets, downloads)
+        finally:
+            # The cache may evict the files again once rendered
+            for download in downloads:
+                if download and not isinstance(download, BaseException):
+                    self.hub.release_asset(download)
+
+    async def _render_slide(self, assets: list[AssetInfo], downloads: list[bytes | str | None]) -> bytes | None:
+        """Render downloaded assets into a slide."""
+        # Downloaded bytes, or cache file paths the render job maps into memory
+        asset_sources = []
+        for asset, asset_source in zip(assets, downloads):
+            if asset_source:
+                asset_sources.append(asset_source)
+            else:
+                _LOGGER.warning(f"Failed to download asset with ID: {asset.asset_id}")
 
-        # Convert to RGB if the image is in RGBA mode
-        if processed_image.mode == 'RGBA':
-            processed_image = processed_image.convert('RGB')        
+        if not asset_sources:
+            _LOGGER.error("Failed to download any images")
+            return None
 
-        with BytesIO() as output:
-            processed_image.save(output, format="JPEG", quality=95, optimize=True)
-            self._current_image_bytes = output.getvalue()
+        _LOGGER.debug(f"Processing {len(asset_sources)} images")
+        try:
+            image_bytes, is_combined, self._held_portrait_image = await self.renderer.async_render(
+                render_slideshow_image,
+                asset_sources,
+                self._output_width,
+                self._output_height,
+                self.config_entry.options.get(CONF_CROP_MODE, DEFAULT_CROP_MODE),
+                self.config_entry.options.get(CONF_IMAGE_SELECTION_MODE, DEFAULT_IMAGE_SELECTION_MODE),
+                self._held_portrait_image,
+                self.config_entry.options.get(CONF_RENDER_PROFILE, DEFAULT_RENDER_PROFILE),
+                self._output_format,
+            )
+        except OSError as exception:
+            _LOGGER.warning(f"Unable to read downloaded assets: {exception}")
+            return None
 
-        _LOGGER.debug(f"Image updated, size: {len(self._current_image_bytes)} bytes, Combined: {is_combined}")
-        self._attr_image_last_updated = datetime.now()
+        if image_bytes is None:
+            _LOGGER.info("No image to display at this time (waiting for another portrait image)")
+            return None
+
+        _LOGGER.debug(f"Image rendered, size: {len(image_bytes)} bytes, Combined: {is_combined}")
+        return image_bytes
 
 class ImmichImageFavorite(BaseImmichImage):
     """Image entity for Immich that displays a random image from the user's favorites."""
 
-    def __init__(self, hass: HomeAssistant, hub: ImmichHub, config_entry: ConfigEntry, update_interval: timedelta) -> None:
+    _source = FAVORITES_SOURCE
+
+    def __init__(self, hass: HomeAssistant, data: ImmichData, config_entry: ConfigEntry, scheduler: RefreshScheduler) -> None:
         """Initialize the Immich image entity."""
-        super().__init__(hass, hub, config_entry, update_interval)
+        super().__init__(hass, data, config_entry, scheduler)
         self._attr_unique_id = f"{config_entry.entry_id}_favorite_image"
         self._attr_name = "Immich: Random favorite image"
 
-    async def _refresh_available_asset_ids(self) -> list[str] | None:
-        """Refresh the list of available asset IDs."""
-        return [image["id"] for image in await self.hub.list_favorite_images()]
-
 class ImmichImageAlbum(BaseImmichImage):
     """Image entity for Immich that displays a random image from a specific album."""
 
-    def __init__(self, hass: HomeAssistant, hub: ImmichHub, config_entry: ConfigEntry, album_id: str, album_name: str, update_interval: timedelta) -> None:
+    def __init__(self, hass: HomeAssistant, data: ImmichData, config_entry: ConfigEntry, album_id: str, album_name: str, scheduler: RefreshScheduler) -> None:
         """Initialize the Immich image entity."""
-        super().__init__(hass, hub, config_entry, update_interval)
+        super().__init__(hass, data, config_entry, scheduler)
         self._album_id = album_id
+        self._source = album_id
         self._attr_unique_id = f"{config_entry.entry_id}_{album_id}"
         self._attr_name = f"Immich: {album_name}"
-        self.hub.initialize_asset_cache()
-
-    async def _refresh_available_asset_ids(self) -> list[str] | None:
-        """Refresh the list of available asset IDs."""
-        album_assets = [image["id"] for image in await self.hub.list_album_images(self._album_id)]
-        await self.hub.cache_album_assets(album_assets=album_assets)
-        
-        return album_assets #[image["id"] for image in await self.hub.list_album_images(self._album_id)]
@@ -0,0 +1,137 @@
+"""Incremental parsing of large JSON responses."""
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+import codecs
+import json
+from typing import Any
+
+import aiohttp
+
+from .const import DOWNLOAD_CHUNK_SIZE
+
+_WHITESPACE = " \t\n\r"
+
+
+async def async_load_json_stream(
+    content: aiohttp.StreamReader, array_path: Sequence[str], trim: Callable[[Any], Any]
+) -> dict[str, Any]:
+    """Parse a JSON object from a response body as it arrives.
+
+    The array found under the keys of array_path is decoded one element at a time, and
+    only what trim returns for each element is kept. The rest of the document is decoded
+    as usual, so the full body and the full array never need to be in memory.
+    """
+    parser = _JsonStreamParser(content)
+    result = await parser.parse_object(tuple(array_path), trim)
+    if await parser.peek() != "":
+        raise ValueError("Extra data after JSON document")
+    return result
+
+
+class _JsonStreamParser:
+    """Walk a JSON document over a buffer refilled from a stream."""
+
+    def __init__(self, content: aiohttp.StreamReader) -> None:
+        """Initialize."""
+        self._content = content
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    async def parse_object(self, array_path: tuple[str, ...], trim: Callable[[Any], Any]) -> dict[str, Any]:
+        """Parse an object, descending into the key leading to the array."""
+        await self._expect("{")
+        result: dict[str, Any] = {}
+        if await self.peek() == "}":
+            self._pos += 1
+            return result
+
+        while True:
+            key = await self._value()
+            if not isinstance(key, str):
+                raise ValueError("Expected an object key")
+            await self._expect(":")
+
+            if array_path and key == array_path[0]:
+                if len(array_path) == 1:
+                    result[key] = await self._parse_array(trim)
+                else:
+                    result[key] = await self.parse_object(array_path[1:], trim)
+            else:
+                result[key] = await self._value()
+
+            if await self._separator("}"):
+                return result
+
+    async def peek(self) -> str:
+        """Return the next character that isn't whitespace, empty at the end of the body."""
+        while True:
+            buffer = self._buffer
+            pos = self._pos
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not await self._fill():
+                return ""
+
+    async def _parse_array(self, trim: Callable[[Any], Any]) -> list[Any]:
+        """Parse an array element by element, keeping the trimmed elements."""
+        await self._expect("[")
+        items: list[Any] = []
+        if await self.peek() == "]":
+            self._pos += 1
+            return items
+
+        while True:
+            items.append(trim(await self._value()))
+            if await self._separator("]"):
+                return items
+
+    async def _separator(self, closing: str) -> bool:
+        """Consume a comma or the closing character, returning whether it closed."""
+        char = await self.peek()
+        if char not in (",", closing):
+            raise ValueError(f"Expected ',' or '{closing}' at offset {self._pos}")
+        self._pos += 1
+        return char == closing
+
+    async def _expect(self, char: str) -> None:
+        """Consume a structural character."""
+        if await self.peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self._pos}")
+        self._pos += 1
+
+    async def _value(self) -> Any:
+        """Decode the next complete value, reading more of the body as needed."""
+        await self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not await self._fill():
+                    raise
+                continue
+            # A number running to the end of the buffer may continue in the next chunk
+            if end == len(self._buffer) and await self._fill():
+                continue
+            self._pos = end
+            return value
+
+    async def _fill(self) -> bool:
+        """Append the next chunk to the buffer, dropping what was consumed."""
+        if self._eof:
+            return False
+        chunk = await self._content.read(DOWNLOAD_CHUNK_SIZE)
+        if not chunk:
+            self._eof = True
+            text = self._text_decoder.decode(b"", final=True)
+        else:
+            text = self._text_decoder.decode(chunk)
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        return bool(chunk) or bool(text)
@@ -0,0 +1,19 @@
+"""Runtime data for the Immich integration."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from .asset_coordinator import ImmichAssetCoordinator
+from .events import ImmichEventListener
+from .hub import ImmichHub
+from .renderer import ImageRenderer
+
+
+@dataclass
+class ImmichData:
+    """Objects shared by everything set up for one config entry."""
+
+    hub: ImmichHub
+    renderer: ImageRenderer
+    coordinator: ImmichAssetCoordinator
+    events: ImmichEventListener | None = None
@@ -0,0 +1,73 @@
+"""Worker pool for the Immich slideshow render pipeline."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import logging
+import multiprocessing
+from typing import Any, TypeVar
+
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import MAX_PENDING_RENDERS_PER_WORKER
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class ImageRenderer:
+    """Run render jobs off the event loop in a bounded thread or process pool."""
+
+    def __init__(self, pool_type: str, max_workers: int) -> None:
+        """Initialize."""
+        self.pool_type = pool_type
+        self.max_workers = max_workers
+        self._max_pending = max_workers * MAX_PENDING_RENDERS_PER_WORKER
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self._pending = 0
+        self._executor: Executor | None = None
+
+    def _get_executor(self) -> Executor:
+        """Return the worker pool, creating it on first use."""
+        if self._executor is None:
+            if self.pool_type == "process":
+                # Spawn rather than fork, the Home Assistant process is heavily threaded
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="immich_render"
+                )
+            _LOGGER.debug("Started %s render pool with %d workers", self.pool_type, self.max_workers)
+        return self._executor
+
+    def has_capacity(self, reserve: int = 0) -> bool:
+        """Return whether a render would be queued, leaving reserve queue slots free for others."""
+        return self._pending + reserve < self._max_pending
+
+    async def async_render(self, func: Callable[..., _T], *args: Any) -> _T:
+        """Run a render job in the pool, refusing work once the queue is full."""
+        if self._pending >= self._max_pending:
+            raise RenderQueueFull()
+
+        self._pending += 1
+        try:
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        """Shut down the worker pool without waiting for running jobs."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class RenderQueueFull(HomeAssistantError):
+    """Error to indicate that too many renders are already queued."""
@@ -0,0 +1,133 @@
+"""Refresh scheduling shared by the entities of a config entry."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import logging
+import random
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class _ScheduledRefresh:
+    """An entity refresh and when it is next due, in event loop time."""
+
+    name: str
+    refresh: Callable[[], Awaitable[None]]
+    # Start of the slot of the entity in the current interval
+    slot: float = 0.0
+    # Slot plus jitter
+    due: float = 0.0
+    started: float = float("-inf")
+    task: asyncio.Task | None = None
+
+
+class RefreshScheduler:
+    """Spread the refreshes of the entities of a config entry evenly over the update interval.
+
+    One timer serves all entities. At most max_concurrent refreshes run at once, and a
+    refresh that is still running when its next turn comes makes that turn be skipped.
+    """
+
+    def __init__(self, hass: HomeAssistant, interval: timedelta, max_concurrent: int, jitter: float) -> None:
+        """Initialize, with jitter as a fraction of the spacing between refreshes."""
+        self.hass = hass
+        self._interval = interval.total_seconds()
+        self._jitter = jitter
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._refreshes: list[_ScheduledRefresh] = []
+        self._epoch = hass.loop.time()
+        self._unsub_timer: CALLBACK_TYPE | None = None
+
+    @property
+    def interval(self) -> float:
+        """Return the update interval in seconds."""
+        return self._interval
+
+    @callback
+    def async_add(self, name: str, refresh: Callable[[], Awaitable[None]]) -> CALLBACK_TYPE:
+        """Refresh now and then once per interval until the returned callable is called."""
+        entry = _ScheduledRefresh(name, refresh)
+        self._refreshes.append(entry)
+        self._start(entry)
+        self._rebalance()
+
+        @callback
+        def remove() -> None:
+            self._refreshes.remove(entry)
+            if entry.task is not None:
+                entry.task.cancel()
+            self._rebalance()
+
+        return remove
+
+    @callback
+    def _rebalance(self) -> None:
+        """Give every refresh an evenly spaced slot in the interval."""
+        now = self.hass.loop.time()
+        spacing = self._interval / len(self._refreshes) if self._refreshes else 0
+        for index, entry in enumerate(self._refreshes):
+            slot = self._epoch + index * spacing
+            # Next time the slot comes round, at least half an interval after the last refresh
+            earliest = max(now, entry.started + self._interval / 2)
+            slot += max(0, -((slot - earliest) // self._interval)) * self._interval
+            entry.slot = slot
+            entry.due = slot + self._random_jitter(spacing)
+        self._schedule_timer()
+
+    def _random_jitter(self, spacing: float) -> float:
+        """Return a random delay of up to the jitter share of the spacing."""
+        return random.uniform(0, self._jitter * spacing) if self._jitter else 0
+
+    @callback
+    def _schedule_timer(self) -> None:
+        """Wake up when the next refresh is due."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        if not self._refreshes:
+            return
+
+        delay = min(entry.due for entry in self._refreshes) - self.hass.loop.time()
+        self._unsub_timer = async_call_later(self.hass, max(delay, 0), self._handle_timer)
+
+    @callback
+    def _handle_timer(self, _now: datetime) -> None:
+        """Start the refreshes that are due and move them to the next interval."""
+        self._unsub_timer = None
+        now = self.hass.loop.time()
+        spacing = self._interval / len(self._refreshes)
+        for entry in self._refreshes:
+            if entry.due > now:
+                continue
+            self._start(entry)
+            # Skip slots missed while the event loop was busy instead of catching up
+            entry.slot += ((now - entry.slot) // self._interval + 1) * self._interval
+            entry.due = entry.slot + self._random_jitter(spacing)
+        self._schedule_timer()
+
+    @callback
+    def _start(self, entry: _ScheduledRefresh) -> None:
+        """Run a refresh in the background, unless the previous one is still running."""
+        if entry.task is not None and not entry.task.done():
+            _LOGGER.debug("Skipping refresh of %s, the previous one is still running", entry.name)
+            return
+
+        entry.started = self.hass.loop.time()
+        entry.task = self.hass.async_create_background_task(
+            self._async_run(entry), f"immich refresh {entry.name}"
+        )
+
+    async def _async_run(self, entry: _ScheduledRefresh) -> None:
+        """Run a refresh once a concurrency slot is free."""
+        async with self._semaphore:
+            try:
+                await entry.refresh()
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error refreshing %s", entry.name)
@@ -0,0 +1,158 @@
+"""Shuffle bag for random slideshow order without repeats."""
+from __future__ import annotations
+
+from array import array
+import base64
+from collections.abc import Sequence
+import random
+from typing import Any
+
+from .asset_index import AssetIndex
+
+
+class ShuffleBag:
+    """Draw asset positions in random order, each once per cycle, in constant time per draw.
+
+    Positions before the cursor were drawn this cycle. Each draw swaps a random undrawn
+    position to the cursor, an incremental Fisher-Yates shuffle, so following a new
+    asset index never reshuffles the assets that stayed.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._asset_index: AssetIndex | None = None
+        self._order = array("I")
+        # Asset position -> index in _order, -1 if not in the bag
+        self._slots = array("i")
+        self._cursor = 0
+        self._last = -1
+
+    def __len__(self) -> int:
+        """Return the number of positions in the bag."""
+        return len(self._order)
+
+    def is_synced(self, asset_index: AssetIndex) -> bool:
+        """Return whether the bag already follows the asset index."""
+        return asset_index is self._asset_index
+
+    def sync(self, asset_index: AssetIndex, positions: Sequence[int] | None = None) -> None:
+        """Follow a new asset index, drawing from the given positions or all of them.
+
+        Assets that stayed keep their place in the cycle, new ones join the undrawn part.
+        """
+        if asset_index is self._asset_index:
+            return
+
+        size = len(asset_index)
+        if positions is None:
+            positions = range(size)
+        wanted = bytearray(size)
+        for position in positions:
+            wanted[position] = 1
+
+        order = array("I")
+        cursor = 0
+        last = -1
+        if self._asset_index is not None:
+            remap = asset_index.remap(self._asset_index)
+            for i, old_position in enumerate(self._order):
+                position = remap[old_position]
+                if position >= 0 and wanted[position]:
+                    order.append(position)
+                    wanted[position] = 0
+                    if i < self._cursor:
+                        cursor += 1
+            if self._last >= 0:
+                last = remap[self._last]
+
+        order.extend(position for position in positions if wanted[position])
+
+        self._asset_index = asset_index
+        self._order = order
+        self._slots = array("i", [-1]) * size
+        for i, position in enumerate(order):
+            self._slots[position] = i
+        self._cursor = cursor
+        self._last = last
+
+    def as_dict(self) -> dict[str, Any] | None:
+        """Return the cycle in a form that can be stored as JSON, None if never synced.
+
+        The order of the undrawn part doesn't matter, so only a bitmap of drawn positions is kept.
+        """
+        if self._asset_index is None:
+            return None
+        drawn = bytearray((len(self._slots) + 7) // 8)
+        for position in self._order[:self._cursor]:
+            drawn[position >> 3] |= 1 << (position & 7)
+        return {"drawn": base64.b64encode(drawn).decode(), "last": self._last}
+
+    def restore(
+        self, asset_index: AssetIndex, data: dict[str, Any], positions: Sequence[int] | None = None
+    ) -> None:
+        """Resume a cycle stored with as_dict for the same asset index and positions.
+
+        Raises ValueError if the stored cycle doesn't fit the asset index.
+        """
+        size = len(asset_index)
+        drawn = base64.b64decode(data["drawn"])
+        last = int(data["last"])
+        if len(drawn) != (size + 7) // 8 or not -1 <= last < size:
+            raise ValueError("Stored shuffle cycle doesn't match the asset index")
+
+        if positions is None:
+            positions = range(size)
+        order = array("I")
+        undrawn = array("I")
+        for position in positions:
+            (order if drawn[position >> 3] & (1 << (position & 7)) else undrawn).append(position)
+        cursor = len(order)
+        order.extend(undrawn)
+        slots = array("i", [-1]) * size
+        for i, position in enumerate(order):
+            slots[position] = i
+
+        self._asset_index = asset_index
+        self._order = order
+        self._slots = slots
+        self._cursor = cursor
+        self._last = last
+
+    def draw(self) -> int | None:
+        """Return the next random position, starting a new cycle once all were drawn."""
+        size = len(self._order)
+        if not size:
+            return None
+
+        if self._cursor >= size:
+            self._cursor = 0
+
+        i = random.randrange(self._cursor, size)
+        # Don't show the last asset of a cycle again as the first of the next
+        while size > 1 and self._order[i] == self._last:
+            i = random.randrange(self._cursor, size)
+
+        position = self._order[i]
+        self._swap(i, self._cursor)
+        self._cursor += 1
+        self._last = position
+        return position
+
+    def mark_drawn(self, position: int) -> None:
+        """Count a position shown by other means as drawn for this cycle."""
+        if not 0 <= position < len(self._slots):
+            return
+
+        i = self._slots[position]
+        if i < self._cursor:
+            return
+
+        self._swap(i, self._cursor)
+        self._cursor += 1
+
+    def _swap(self, i: int, j: int) -> None:
+        """Swap two entries of the order."""
+        order = self._order
+        order[i], order[j] = order[j], order[i]
+        self._slots[order[i]] = i
+        self._slots[order[j]] = j
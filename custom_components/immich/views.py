@@ -0,0 +1,80 @@
+"""HTTP views for the Immich integration."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from aiohttp import hdrs, web
+
+from homeassistant.components.http import KEY_AUTHENTICATED, HomeAssistantView
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import DATA_RENDITION_ENTITIES, RENDITION_URL
+
+if TYPE_CHECKING:
+    from .image import BaseImmichImage
+
+
+@callback
+def async_register_rendition_entity(hass: HomeAssistant, entity: BaseImmichImage) -> CALLBACK_TYPE:
+    """Serve the renditions of an entity, registering the view on first use."""
+    entities: dict[str, BaseImmichImage] | None = hass.data.get(DATA_RENDITION_ENTITIES)
+    if entities is None:
+        entities = hass.data[DATA_RENDITION_ENTITIES] = {}
+        hass.http.register_view(ImmichRenditionView(entities))
+
+    entity_id = entity.entity_id
+    entities[entity_id] = entity
+
+    @callback
+    def _async_unregister() -> None:
+        if entities.get(entity_id) is entity:
+            del entities[entity_id]
+
+    return _async_unregister
+
+
+class ImmichRenditionView(HomeAssistantView):
+    """View to serve the current slide of an entity at the size a client asks for."""
+
+    name = "api:immich:rendition"
+    requires_auth = False
+    url = RENDITION_URL
+
+    def __init__(self, entities: dict[str, BaseImmichImage]) -> None:
+        """Initialize."""
+        self.entities = entities
+
+    async def get(self, request: web.Request, entity_id: str) -> web.StreamResponse:
+        """Return the rendition nearest the requested width, or 304 if the client has it."""
+        if (entity := self.entities.get(entity_id)) is None:
+            raise web.HTTPNotFound()
+
+        # Same rules as the image proxy: a session, or the entity access token
+        authenticated = (
+            request[KEY_AUTHENTICATED]
+            or request.query.get("token") in entity.access_tokens
+        )
+        if not authenticated:
+            if hdrs.AUTHORIZATION in request.headers:
+                raise web.HTTPUnauthorized()
+            raise web.HTTPForbidden()
+
+        try:
+            width = int(request.query.get("width", 0))
+        except ValueError as e:
+            raise web.HTTPBadRequest() from e
+
+        if (rendition := await entity.async_rendition(width)) is None:
+            raise web.HTTPNotFound()
+
+        content, etag = rendition
+        headers = {
+            hdrs.ETAG: f'"{etag}"',
+            # Slides change in place, so clients must revalidate, which costs a 304 at most
+            hdrs.CACHE_CONTROL: "private, no-cache",
+        }
+
+        if any(tag.value in (etag, "*") for tag in request.if_none_match or ()):
+            return web.Response(status=304, headers=headers)
+
+        return web.Response(body=content, content_type=entity.content_type, headers=headers)
@@ -0,0 +1,121 @@
+"""Benchmark decoding a photo for a slide, at full resolution and at a reduced DCT scale.
+
+Every variant runs in a fresh interpreter so its peak RSS can be read on its own,
+from /proc, so on Linux only.
+The full decode is the pipeline before draft decoding: the downloaded bytes are
+opened, decoded at native resolution, rotated and shrunk. The draft variants go
+through open_image_for_box with the resample filter of each render profile. Run
+from the repository root:
+
+    python scripts/bench_decode.py [--image assets/demo.jpg] [--size 2048x1536] [--runs 3]
+
+Besides the given image, a 24 MP upscale of it is benchmarked as a fullsize
+phone or camera original.
+"""
+from __future__ import annotations
+
+import argparse
+from io import BytesIO
+import json
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from PIL import Image, ImageOps
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from custom_components.immich.const import RENDER_PROFILE_RESAMPLE  # noqa: E402
+from custom_components.immich.coordinator import (  # noqa: E402
+    correct_image_orientation,
+    open_image_for_box,
+    process_single_image,
+)
+
+_LARGE_SIZE = (5664, 4248)
+_VARIANTS = ["full", *(f"draft-{profile}" for profile in RENDER_PROFILE_RESAMPLE)]
+
+
+def _decode(variant: str, image_path: str, width: int, height: int) -> Image.Image:
+    """Turn a photo into a slide-sized image the way the variant does."""
+    if variant == "full":
+        with open(image_path, "rb") as f:
+            data = f.read()
+        image = correct_image_orientation(Image.open(BytesIO(data)))
+        return ImageOps.contain(image, (width, height), Image.Resampling.LANCZOS)
+
+    resample = Image.Resampling[RENDER_PROFILE_RESAMPLE[variant.removeprefix("draft-")]]
+    image = open_image_for_box(image_path, width, height, "None")
+    return process_single_image(image, width, height, resample)
+
+
+def _memory_kb(field: str) -> int:
+    """Return a memory figure of this process from /proc, in kB."""
+    with open("/proc/self/status", encoding="ascii") as status:
+        for line in status:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+    raise RuntimeError(f"{field} is not reported")
+
+
+def _worker(variant: str, image_path: str, width: int, height: int, runs: int) -> None:
+    """Time the variant and print its timings and peak RSS above the interpreter baseline, as JSON."""
+    # The peak is inherited from the parent across fork and exec, so start it over
+    with open("/proc/self/clear_refs", "w", encoding="ascii") as clear_refs:
+        clear_refs.write("5")
+    base_kb = _memory_kb("VmRSS")
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        _decode(variant, image_path, width, height)
+        timings.append(time.perf_counter() - started)
+    peak_kb = _memory_kb("VmHWM")
+    print(json.dumps({"timings": timings, "peak_kb": peak_kb - base_kb}))
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--image", default=str(ROOT / "assets" / "demo.jpg"))
+    parser.add_argument("--size", default="2048x1536", help="slide box, WIDTHxHEIGHT")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    width, height = (int(value) for value in args.size.split("x"))
+
+    if args.worker:
+        _worker(args.worker, args.image, width, height, args.runs)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        large_path = str(Path(directory) / "large.jpg")
+        with Image.open(args.image) as source:
+            source.convert("RGB").resize(_LARGE_SIZE, Image.Resampling.BICUBIC).save(large_path, quality=92)
+
+        for image_path in (args.image, large_path):
+            with Image.open(image_path) as image:
+                print(f"\n{image.width}x{image.height} JPEG into {width}x{height}, best of {args.runs}")
+            print(f"{'variant':<16} {'decode ms':>10} {'median ms':>10} {'peak RSS MB':>12}")
+            for variant in _VARIANTS:
+                output = subprocess.run(
+                    [
+                        sys.executable, __file__, "--worker", variant, "--image", image_path,
+                        "--size", args.size, "--runs", str(args.runs),
+                    ],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(
+                    f"{variant:<16} {1000 * min(result['timings']):10.1f} "
+                    f"{1000 * statistics.median(result['timings']):10.1f} {result['peak_kb'] / 1024:12.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Benchmark slide encoding per output format and render profile.
+
+Renders the demo photo onto the output canvas once, then encodes it with every
+entry of ENCODE_PROFILES and reports the encode time and output size. Run from the
+repository root:
+
+    python scripts/bench_encode.py [--image assets/demo.jpg] [--size 2048x1536] [--runs 5]
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import statistics
+import sys
+import time
+
+from PIL import Image, ImageOps
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from custom_components.immich.const import OUTPUT_FORMATS, RENDER_PROFILES  # noqa: E402
+from custom_components.immich.coordinator import encode_image  # noqa: E402
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--image", default=str(ROOT / "assets" / "demo.jpg"))
+    parser.add_argument("--size", default="2048x1536", help="output canvas, WIDTHxHEIGHT")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.size.split("x"))
+    with Image.open(args.image) as source:
+        slide = ImageOps.contain(source.convert("RGB"), (width, height), Image.Resampling.LANCZOS)
+
+    print(f"{Path(args.image).name} on a {width}x{height} canvas ({slide.width}x{slide.height}), best of {args.runs}")
+    print(f"{'format':<18} {'profile':<10} {'encode ms':>10} {'median ms':>10} {'bytes':>10}")
+    for output_format in OUTPUT_FORMATS:
+        for render_profile in RENDER_PROFILES:
+            timings = []
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                encoded = encode_image(slide, output_format, render_profile)
+                timings.append(time.perf_counter() - started)
+            print(
+                f"{output_format:<18} {render_profile:<10} {1000 * min(timings):10.1f} "
+                f"{1000 * statistics.median(timings):10.1f} {len(encoded):10d}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Benchmark Immich API requests with a session per request against the pooled hub session.
+
+Starts a local aiohttp stub of /api/auth/validateToken and fires the same requests
+both ways, as several entities refreshing at once would. Run from the repository root:
+
+    python scripts/bench_session.py [--requests 2000] [--concurrency 12] [--tls]
+
+With --tls the stub serves HTTPS with a throwaway self-signed certificate, so the
+cost of the handshakes the pooled session avoids is included.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+from pathlib import Path
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_components.immich.hub import ImmichHub  # noqa: E402
+
+_API_KEY = "bench"
+
+
+async def _validate_token(request: web.Request) -> web.Response:
+    """Answer like Immich does for a valid API key."""
+    return web.json_response({"authStatus": True})
+
+
+def _make_certificate(directory: str) -> tuple[str, str]:
+    """Create a self-signed certificate for localhost, returning the certificate and key paths."""
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+            "-keyout", key, "-out", cert,
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+async def _per_request_session(host: str) -> None:
+    """Validate the token the way the hub did before, with a session of its own."""
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            url=f"{host}/api/auth/validateToken", headers={"x-api-key": _API_KEY}
+        ) as response:
+            await response.json()
+
+
+async def _run(name: str, request, total: int, concurrency: int) -> None:
+    """Fire total requests from concurrency workers and print throughput and latency."""
+    latencies: list[float] = []
+    remaining = iter(range(total))
+
+    async def worker() -> None:
+        for _ in remaining:
+            started = time.perf_counter()
+            await request()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(
+        f"{name:<22} {total / elapsed:9.0f} req/s   "
+        f"median {1000 * statistics.median(latencies):6.2f} ms   p95 {1000 * p95:6.2f} ms"
+    )
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=12)
+    parser.add_argument("--tls", action="store_true")
+    args = parser.parse_args()
+
+    app = web.Application()
+    app.router.add_post("/api/auth/validateToken", _validate_token)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+
+    with tempfile.TemporaryDirectory() as directory:
+        ssl_context = None
+        scheme = "http"
+        if args.tls:
+            cert, key = _make_certificate(directory)
+            ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            ssl_context.load_cert_chain(cert, key)
+            # Clients verify the stub against its own certificate
+            os.environ["SSL_CERT_FILE"] = cert
+            scheme = "https"
+
+        site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=ssl_context)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # pylint: disable=protected-access
+        host = f"{scheme}://localhost:{port}"
+
+        hub = ImmichHub(host=host, api_key=_API_KEY, hass=None, config_entry=None)
+        print(f"{args.requests} requests, {args.concurrency} at once, {scheme.upper()}")
+        try:
+            await _run("session per request", lambda: _per_request_session(host), args.requests, args.concurrency)
+            await _run("pooled hub session", hub.authenticate, args.requests, args.concurrency)
+        finally:
+            await hub.async_close()
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())